@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+from logging import Logger
+from pathlib import Path
+
+from app.core.logger import AppLogger
+
+# Heavy modules (SQLAlchemy, Playwright, APScheduler, requests) are imported inside the
+# subcommands that need them, so `--help` or `stats` never pay for a browser stack.
+
+
+def get_db_client(args: argparse.Namespace, logger: Logger):
+    from app.core.database import DatabaseClient
+
+    if args.db:
+        url = f"sqlite+aiosqlite:///{args.db}"
+    else:
+        from app.core.config import load_config
+
+        url = load_config(args.config).database.url
+
+    return DatabaseClient(url=url, logger=logger)
+
+
+async def init_database(logger: Logger):
+    from app.core.config import get_config
+    from app.core.database import DatabaseClient
+
+    db_path = Path(get_config().database.path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Database directory ready: {db_path.parent}")
+
+    db_client = DatabaseClient(url=get_config().database.url, logger=logger)
+    await db_client.create_models()
+    logger.info("Database initialized successfully")
+
+    return db_client
+
+
+async def run_initial_scrape(logger: Logger, resume: bool):
+    from app.services.crawler import crawl
+    from app.services.diagnostics import profile_run
+
+    db_client = await init_database(logger)
+
+    try:
+        logger.info("Starting initial scrape ...")
+        async with profile_run(logger):
+            await crawl(db_client, logger, resume=resume)
+        logger.info("Initial scrape completed")
+    finally:
+        await db_client.cleanup()
+
+
+async def scrape_once(args: argparse.Namespace, logger: Logger):
+    from app.core.config import load_config
+
+    config = load_config(args.config)
+
+    if args.record or args.replay:
+        update = {"mode": "record" if args.record else "replay", "archive": args.record or args.replay}
+        # Without --speed, the configured replay speed applies
+        if args.speed is not None:
+            update["replay_speed"] = args.speed
+        config.source = config.source.model_copy(update=update)
+
+    if args.profile:
+        config.diagnostics = config.diagnostics.model_copy(update={"profile": True})
+
+    await run_initial_scrape(logger, resume=args.resume or config.app.resume_crawls)
+
+
+async def serve(args: argparse.Namespace, logger: Logger):
+    from app.core.config import load_config
+    from app.services.diagnostics import Diagnostics
+    from app.services.notify import send_discord_error
+
+    config = load_config(args.config)
+    logger.info("Starting application")
+    api = None
+
+    # Hang diagnostics for the whole process; `kill -USR1` profiles the next crawl run
+    diagnostics = Diagnostics(logger)
+    diagnostics.start()
+
+    try:
+        if config.api.enabled:
+            from app.services.api import start_api
+
+            # Serves alongside the crawls, on its own read-only connection
+            api = await start_api(logger)
+
+        await run_initial_scrape(logger, resume=config.app.resume_crawls)
+
+        if config.scheduler.enabled:
+            from app.services.scheduler import start_scheduler
+
+            logger.info("Starting scheduler ...")
+            await start_scheduler(logger)
+        else:
+            logger.info("Scheduler disabled, exiting after initial scrape")
+
+    except Exception as e:
+        logger.error(f"Application failure: {e}", exc_info=True)
+        if config.discord.notify_on_error:
+            send_discord_error(
+                f"Application failed to start: {e}", logger.getChild("discord"), "Critical Startup Error"
+            )
+        raise
+    finally:
+        if api is not None:
+            await api.close()
+        await diagnostics.stop()
+
+
+async def stats(args: argparse.Namespace, logger: Logger):
+    db_client = get_db_client(args, logger)
+
+    try:
+        result = await db_client.get_stats(top_locations=args.top)
+    finally:
+        await db_client.cleanup()
+
+    if args.json:
+        print(json.dumps(result, default=str, indent=2))
+        return
+
+    print(f"Listings:      {result['total']}")
+    print(f"Price changes: {result['price_changes']}")
+    print(f"First seen:    {result['first_seen']}")
+    print(f"Last seen:     {result['last_seen']}")
+
+    for row in result["by_type"]:
+        line = f"  {row['listing_type']:<8} {row['count']:>6} listings, avg €{row['avg_price'] or 0:,.2f}"
+        if row["avg_price_per_sqm"]:
+            line += f", avg €{row['avg_price_per_sqm']:,.2f}/m²"
+        print(line)
+
+    if result["top_locations"]:
+        print("Top locations:")
+        for row in result["top_locations"]:
+            print(f"  {row['count']:>6}  {row['location']}")
+
+
+async def search(args: argparse.Namespace, logger: Logger):
+    from app.core.models import ListingType
+
+    db_client = get_db_client(args, logger)
+
+    try:
+        rows = await db_client.search_listings(
+            args.query, listing_type=ListingType(args.type) if args.type else None, limit=args.limit
+        )
+    finally:
+        await db_client.cleanup()
+
+    if args.json:
+        print(json.dumps([dict(row) for row in rows], default=str, indent=2, ensure_ascii=False))
+        return
+
+    if not rows:
+        print("No matching listings")
+        return
+
+    for row in rows:
+        print(f"€{row['price'] or 0:>12,.2f}  {row['highlight'] or row['location'] or row['item_id']}")
+        print(f"{'':>15}{row['url']}")
+
+
+async def export(args: argparse.Namespace, logger: Logger):
+    from app.core.models import ListingType
+    from app.services.export import export as export_rows
+
+    db_client = get_db_client(args, logger)
+
+    try:
+        await export_rows(
+            db_client,
+            logger,
+            table=args.table,
+            export_format=args.format,
+            output=args.output,
+            listing_type=ListingType(args.type) if args.type else None,
+            location=args.location,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            incremental=args.incremental,
+            batch_size=args.batch_size,
+        )
+    finally:
+        await db_client.cleanup()
+
+
+async def db_maintain(args: argparse.Namespace, logger: Logger):
+    db_client = get_db_client(args, logger)
+
+    try:
+        result = await db_client.maintain(vacuum=not args.no_vacuum)
+    finally:
+        await db_client.cleanup()
+
+    print(f"Integrity: {result['integrity']}")
+    print(f"Size:      {result['size_before'] / 1024:,.1f} KiB -> {result['size_after'] / 1024:,.1f} KiB")
+
+    if result["integrity"] != "ok":
+        raise SystemExit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="nepremicninko", description="A web crawler for Nepremicnine.net")
+    parser.add_argument("-c", "--config", default="config.yaml", help="Path to the config file (default: config.yaml)")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape_parser = subparsers.add_parser("scrape-once", help="Run a single crawl and exit")
+    scrape_parser.add_argument(
+        "--resume", action="store_true", help="Resume an interrupted crawl even if resume_crawls is disabled"
+    )
+    source_group = scrape_parser.add_mutually_exclusive_group()
+    source_group.add_argument("--record", metavar="ARCHIVE", help="Save every navigated page to ARCHIVE")
+    source_group.add_argument(
+        "--replay", metavar="ARCHIVE", help="Serve pages from ARCHIVE instead of the network (no notifications)"
+    )
+    scrape_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the crawl and write flamegraph stacks to diagnostics.profile_dir",
+    )
+    scrape_parser.add_argument(
+        "--speed",
+        type=float,
+        help="Replay speed relative to the recording, 0 disables delays (default: source.replay_speed)",
+    )
+    scrape_parser.set_defaults(handler=scrape_once)
+    subparsers.add_parser("serve", help="Run an initial crawl, then start the scheduler").set_defaults(handler=serve)
+
+    db_parent = argparse.ArgumentParser(add_help=False)
+    db_parent.add_argument("--db", help="Path to the SQLite database (skips loading the config file)")
+
+    stats_parser = subparsers.add_parser("stats", parents=[db_parent], help="Print listing statistics")
+    stats_parser.add_argument("--top", type=int, default=10, help="Number of top locations to show")
+    stats_parser.add_argument("--json", action="store_true", help="Print statistics as JSON")
+    stats_parser.set_defaults(handler=stats)
+
+    search_parser = subparsers.add_parser("search", parents=[db_parent], help="Full-text search listing titles")
+    search_parser.add_argument("query", help='Words to match, e.g. "balkon bezigrad"')
+    search_parser.add_argument("--type", choices=["selling", "renting"], help="Only search this listing type")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    search_parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    search_parser.set_defaults(handler=search)
+
+    export_parser = subparsers.add_parser("export", parents=[db_parent], help="Export listings or price history")
+    export_parser.add_argument("table", nargs="?", choices=["listings", "price-history"], default="listings")
+    export_parser.add_argument("-f", "--format", choices=["csv", "ndjson", "parquet"], default="csv")
+    export_parser.add_argument("-o", "--output", help="Output file (default: stdout, required for parquet)")
+    export_parser.add_argument("--type", choices=["selling", "renting"], help="Only export this listing type")
+    export_parser.add_argument("--location", help="Only export locations containing this text")
+    export_parser.add_argument(
+        "--from", dest="date_from", type=datetime.fromisoformat, help="First seen / recorded at or after (ISO date)"
+    )
+    export_parser.add_argument(
+        "--to", dest="date_to", type=datetime.fromisoformat, help="First seen / recorded before (ISO date)"
+    )
+    export_parser.add_argument(
+        "--incremental", metavar="NAME", help="Only export rows changed since the last export with this name"
+    )
+    export_parser.add_argument("--batch-size", type=int, default=1000, help="Rows fetched per database round trip")
+    export_parser.set_defaults(handler=export)
+
+    maintain_parser = subparsers.add_parser(
+        "db-maintain", parents=[db_parent], help="Check integrity, refresh statistics and vacuum the database"
+    )
+    maintain_parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM")
+    maintain_parser.set_defaults(handler=db_maintain)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    logger = AppLogger(name="app").get_logger()
+    logger.debug(f"Running command: {args.command}")
+
+    asyncio.run(args.handler(args, logger))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
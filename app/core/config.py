@@ -1,11 +1,22 @@
 from pathlib import Path
+from typing import Literal
 
 import yaml
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 
 
 class AppConfig(BaseModel):
     max_pages_per_url: int = 5
+    resume_crawls: bool = True
+
+    # Page-level retries with jittered exponential backoff
+    page_retries: int = 3
+    retry_base_delay: float = 5.0
+    retry_max_delay: float = 60.0
+
+    # Skip a URL for circuit_cooldown_minutes after circuit_failure_threshold failed runs in a row
+    circuit_failure_threshold: int = 3
+    circuit_cooldown_minutes: int = 60
 
     @field_validator("max_pages_per_url")
     @classmethod
@@ -18,10 +29,27 @@ class AppConfig(BaseModel):
             return 1
         return v
 
+    @field_validator("page_retries", "circuit_failure_threshold")
+    @classmethod
+    def validate_at_least_one(cls, v: int, info: ValidationInfo) -> int:
+        if v < 1:
+            print(f"WARNING: {info.field_name} ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
 class DatabaseConfig(BaseModel):
     path: str = "./storage/db/nepremicninko.sqlite"
     auto_flush: bool = True
 
+    @property
+    def url(self) -> str:
+        return f"sqlite+aiosqlite:///{self.path}"
+
+    @property
+    def read_only_url(self) -> str:
+        return f"sqlite+aiosqlite:///file:{self.path}?mode=ro&uri=true"
+
 
 class DiscordConfig(BaseModel):
     webhook_url: str
@@ -33,6 +61,10 @@ class SchedulerConfig(BaseModel):
     interval_minutes: int = 3
     timezone: str = "Europe/Ljubljana"
 
+    # Apply changes to the config file without a restart, checked every reload_interval_seconds
+    reload_config: bool = True
+    reload_interval_seconds: int = 5
+
     @field_validator("interval_minutes")
     @classmethod
     def validate_interval(cls, v: int) -> int:
@@ -44,12 +76,174 @@ class SchedulerConfig(BaseModel):
             return 3
         return v
 
+    @field_validator("reload_interval_seconds")
+    @classmethod
+    def validate_reload_interval(cls, v: int) -> int:
+        if v < 1:
+            print(f"WARNING: reload_interval_seconds ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
+class EnrichmentConfig(BaseModel):
+    enabled: bool = False
+    concurrency: int = 2
+    requests_per_minute: int = 20
+    cache_ttl_hours: int = 24 * 7
+
+    @field_validator("concurrency")
+    @classmethod
+    def validate_concurrency(cls, v: int) -> int:
+        if v < 1:
+            print(f"WARNING: Enrichment concurrency ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
+class DedupeConfig(BaseModel):
+    enabled: bool = True
+    price_tolerance: float = 0.05
+    size_tolerance: float = 0.02
+    # Minimum share (0-1) of words the normalized titles have in common, 0 disables the check
+    title_similarity: float = 0.5
+    # "annotate" marks reposts in the notification, "suppress" does not notify about them at all
+    notify: Literal["annotate", "suppress"] = "annotate"
+
+    @field_validator("title_similarity")
+    @classmethod
+    def validate_title_similarity(cls, v: float) -> float:
+        if not 0 <= v <= 1:
+            clamped = min(max(v, 0.0), 1.0)
+            print(f"WARNING: title_similarity ({v}) must be between 0 and 1. Using {clamped} instead.")
+            return clamped
+        return v
+
+
+class SourceConfig(BaseModel):
+    # "record" saves every navigated page to the archive, "replay" serves pages from it without network access
+    mode: Literal["live", "record", "replay"] = "live"
+    archive: str = "./storage/recordings/pages.ndjson.gz"
+    # Replay speed relative to the recorded timings, 0 replays without any delays
+    replay_speed: float = 0
+
+
+class BrowserConfig(BaseModel):
+    # Cookies (incl. cookie consent) and local storage, kept between runs
+    storage_state_path: str = "./storage/browser/state.json"
+    # Cookie the consent banner sets; a restored state without it still gets the banner dismissed
+    consent_cookie: str = "euconsent-v2"
+    # Replace the reused browser page after this many navigations
+    recycle_after_pages: int = 10
+
+    @field_validator("recycle_after_pages")
+    @classmethod
+    def validate_recycle_after_pages(cls, v: int) -> int:
+        if v < 1:
+            print(f"WARNING: recycle_after_pages ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
+class PipelineConfig(BaseModel):
+    # Capacity of the queues between the fetch, parse, reconcile and notify stages
+    queue_size: int = 2
+
+    @field_validator("queue_size")
+    @classmethod
+    def validate_queue_size(cls, v: int) -> int:
+        if v < 1:
+            print(f"WARNING: Pipeline queue_size ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
+class PriorityFilter(BaseModel):
+    """Events matching every set condition of a filter are always sent as individual alerts."""
+
+    # "repost" matches new listings that were linked to an earlier listing
+    type: Literal["new", "price_change", "repost"] | None = None
+    listing_type: Literal["selling", "renting"] | None = None
+    # Matched against the normalized location, e.g. "ljubljana" matches "Ljubljana-Bežigrad"
+    location: str | None = None
+    max_price: float | None = None
+    min_size_sqm: float | None = None
+    max_price_per_sqm: float | None = None
+    # Price drop in percent, only price changes can match
+    min_drop_percent: float | None = None
+
+
+class NotificationConfig(BaseModel):
+    # Above either threshold, further events are collapsed into a digest at the end of the run
+    storm_per_run: int = 30
+    storm_per_window: int = 60
+    storm_window_minutes: int = 60
+    # Biggest price drops listed in the digest
+    digest_top_drops: int = 5
+    # Exported events of each digest, also attached to the Discord message
+    digest_dir: str = "./storage/digests"
+    priority: list[PriorityFilter] = Field(default_factory=list)
+
+    @field_validator("storm_per_run", "storm_per_window", "storm_window_minutes")
+    @classmethod
+    def validate_at_least_one(cls, v: int, info: ValidationInfo) -> int:
+        if v < 1:
+            print(f"WARNING: {info.field_name} ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
+class ApiConfig(BaseModel):
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 8080
+    default_limit: int = 50
+    max_limit: int = 500
+    # LRU response cache, also cleared whenever the crawler commits listing changes
+    cache_size: int = 256
+    cache_ttl_seconds: int = 60
+
+    @field_validator("default_limit", "max_limit", "cache_size")
+    @classmethod
+    def validate_at_least_one(cls, v: int, info: ValidationInfo) -> int:
+        if v < 1:
+            print(f"WARNING: {info.field_name} ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
+
+class DiagnosticsConfig(BaseModel):
+    # Profile every crawl run; `kill -USR1 <pid>` profiles only the next one
+    profile: bool = False
+    profile_interval_ms: int = 10
+    profile_dir: str = "./storage/profiles"
+
+    # Dump the stack of a task that waits on the same operation for longer than this, 0 disables
+    stuck_task_seconds: int = 120
+    # Log what the event loop thread is doing when the loop is blocked for longer than this, 0 disables
+    loop_lag_threshold_ms: int = 500
+
+    @field_validator("profile_interval_ms")
+    @classmethod
+    def validate_profile_interval(cls, v: int) -> int:
+        if v < 1:
+            print(f"WARNING: profile_interval_ms ({v}) must be at least 1. Using 1 instead.")
+            return 1
+        return v
+
 
 class Config(BaseModel):
     app: AppConfig
     database: DatabaseConfig
     discord: DiscordConfig
     scheduler: SchedulerConfig
+    enrichment: EnrichmentConfig = Field(default_factory=EnrichmentConfig)
+    dedupe: DedupeConfig = Field(default_factory=DedupeConfig)
+    source: SourceConfig = Field(default_factory=SourceConfig)
+    browser: BrowserConfig = Field(default_factory=BrowserConfig)
+    pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
+    notifications: NotificationConfig = Field(default_factory=NotificationConfig)
+    api: ApiConfig = Field(default_factory=ApiConfig)
+    diagnostics: DiagnosticsConfig = Field(default_factory=DiagnosticsConfig)
     urls: list[str] = Field(default_factory=list)
 
     @classmethod
@@ -65,5 +259,33 @@ class Config(BaseModel):
         return cls(**data)
 
 
-# Load the configuration
-config = Config.from_yaml()
+_config: Config | None = None
+_config_path: Path = Path("config.yaml")
+
+
+def load_config(path: str | Path | None = None) -> Config:
+    """Load (or reload) the configuration from ``path`` and make it the active one."""
+    global _config, _config_path
+
+    if path is not None:
+        _config_path = Path(path)
+
+    _config = Config.from_yaml(_config_path)
+    return _config
+
+
+def get_config() -> Config:
+    """Return the active configuration, loading it on first access."""
+    if _config is None:
+        return load_config()
+    return _config
+
+
+def set_config(config: Config):
+    """Make an already validated configuration the active one, e.g. after a reload."""
+    global _config
+    _config = config
+
+
+def get_config_path() -> Path:
+    return _config_path
@@ -1,18 +1,120 @@
+import itertools
+import re
 import threading
 from asyncio import current_task
-from datetime import datetime
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timedelta
 from logging import Logger
 
-from sqlalchemy import select
+from sqlalchemy import (
+    RowMapping,
+    Select,
+    String,
+    bindparam,
+    cast,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    literal_column,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.schema import CreateColumn
+
+from app.core.locations import normalize_location
+from app.core.models import (
+    LISTING_FTS_DDL,
+    LISTING_FTS_OBJECTS,
+    ConfigState,
+    CrawlCheckpoint,
+    ExportWatermark,
+    Listing,
+    ListingDetail,
+    ListingType,
+    Location,
+    LocationPriceStats,
+    PriceHistory,
+    UrlCircuit,
+    get_model_hash,
+    listing_fts,
+    meta,
+    size_bucket,
+    unit_price,
+)
+from app.core.sketch import QuantileSketch
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all of its words, each as a prefix.
+
+    Prefixes stand in for stemming, which FTS5 has no Slovenian support for: "balkon" also finds "balkonom".
+    Words are quoted, so user input is never interpreted as FTS5 query syntax.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def location_ids_matching(location: str) -> Select:
+    """Ids of the locations whose normalized name contains ``location``, e.g. "lj" matches all of Ljubljana."""
+    key = normalize_location(location) or ""
+    return select(Location.id).where(Location.key.contains(key, autoescape=True))
+
+
+# Callbacks run after a commit that changed listings or their price history, e.g. to drop cached API responses
+_listing_commit_listeners: list[Callable[[], None]] = []
+
+
+def on_listings_committed(callback: Callable[[], None]):
+    _listing_commit_listeners.append(callback)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_listing_flush(session: Session, flush_context):
+    changed = itertools.chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(instance, (Listing, PriceHistory)) for instance in changed):
+        session.info["listings_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_listing_statements(orm_execute_state: ORMExecuteState):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ in (Listing, PriceHistory):
+            orm_execute_state.session.info["listings_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_listing_commit(session: Session):
+    if session.info.pop("listings_changed", False):
+        for callback in _listing_commit_listeners:
+            callback()
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_new_locations(session: Session):
+    # Ids of locations inserted by the session are only cached once they are committed
+    cache = session.info.pop("location_cache", None)
+    new_locations = session.info.pop("new_locations", {})
+    if cache is not None:
+        cache.update(new_locations)
+
 
-from app.core.models import ConfigState, Listing, meta
+@event.listens_for(Session, "after_rollback")
+def _forget_new_locations(session: Session):
+    session.info.pop("location_cache", None)
+    session.info.pop("new_locations", None)
 
 
 class DatabaseClient:
@@ -20,6 +122,8 @@ class DatabaseClient:
         self.db_connections = threading.local()
         self.url = url
         self.logger = logger.getChild("database")
+        # Normalized location name -> Location.id, see intern_location
+        self.location_ids: dict[str, int] = {}
 
     def async_engine(self) -> AsyncEngine:
         if not hasattr(self.db_connections, "engine"):
@@ -45,15 +149,313 @@ class DatabaseClient:
     async def cleanup(self):
         self.logger.debug("Cleaning database engine.")
 
-        await self.db_connections.engine.dispose()
+        if hasattr(self.db_connections, "engine"):
+            await self.db_connections.engine.dispose()
         self.logger.debug("Cleaning database finished.")
 
     async def create_models(self):
         self.logger.debug("Creating ORM modules.")
         async with self.async_engine().begin() as conn:
+            # Write-ahead logging lets readers (e.g. the query API) run alongside crawler writes.
+            # The journal mode is stored in the database file, so this only has to happen once.
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
             await conn.run_sync(meta.create_all)
+            added = await conn.run_sync(self._add_missing_columns)
+            if "listing.updated_at" in added:
+                await conn.run_sync(self._backfill_updated_at)
+            if await conn.run_sync(self._migrate_locations):
+                added.append("location")
+            await self._create_search_index(conn)
+
+        if added:
+            self.logger.info(f"Migrated database schema, added: {', '.join(added)}")
+
+            # The table now matches the model, so there is nothing to flush
+            if await self.get_schema_hash() is not None:
+                await self.set_schema_hash(get_model_hash())
+
+        await self.backfill_dedupe_keys()
+        await self.backfill_price_stats()
+
         self.logger.debug("Finished creating ORM modules.")
 
+    @staticmethod
+    def _add_missing_columns(conn) -> list[str]:
+        """Add nullable columns and indexes that were introduced after a table was created.
+
+        create_all skips existing tables, so neither would be created otherwise.
+        """
+        inspector = inspect(conn)
+        added = []
+
+        for table in meta.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+                added.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    added.append(index.name)
+
+        return added
+
+    @staticmethod
+    def _backfill_updated_at(conn):
+        """Date existing listings by their last price change, or their first sighting if the price never changed."""
+        conn.exec_driver_sql(
+            "UPDATE listing SET updated_at = COALESCE("
+            "(SELECT MAX(recorded_at) FROM price_history WHERE price_history.item_id = listing.item_id), first_seen"
+            ") WHERE updated_at IS NULL"
+        )
+
+    def _migrate_locations(self, conn) -> bool:
+        """Move the free-text listing.location column into the location table.
+
+        Each distinct spelling is interned by its normalized key and listings are pointed at it by id. The old
+        columns and everything built on them (their indexes, the search index and the price statistics, whose
+        key was the normalized name) are dropped; create_models rebuilds the latter two.
+        """
+        inspector = inspect(conn)
+        columns = {column["name"] for column in inspector.get_columns("listing")}
+        if "location" not in columns:
+            return False
+
+        location_ids: dict[str, int] = {}
+        for (name,) in conn.exec_driver_sql("SELECT DISTINCT location FROM listing WHERE location IS NOT NULL").all():
+            key = normalize_location(name)
+            if not key:
+                continue
+
+            if key not in location_ids:
+                location_ids[key] = conn.execute(
+                    insert(Location).values(key=key, name=name.strip()).returning(Location.id)
+                ).scalar_one()
+
+            conn.exec_driver_sql(
+                "UPDATE listing SET location_id = ? WHERE location = ? AND location_id IS NULL",
+                (location_ids[key], name),
+            )
+
+        for kind, name in LISTING_FTS_OBJECTS:
+            conn.exec_driver_sql(f"DROP {kind.upper()} IF EXISTS {name}")
+
+        for index in inspector.get_indexes("listing"):
+            if {"location", "location_key"} & set(index["column_names"]):
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index['name']}")
+
+        try:
+            for column in ("location", "location_key"):
+                if column in columns:
+                    conn.exec_driver_sql(f"ALTER TABLE listing DROP COLUMN {column}")
+        except OperationalError as e:
+            # SQLite before 3.35 cannot drop columns; the old ones are left unused
+            self.logger.warning(f"Could not drop the old location columns: {e}")
+
+        conn.exec_driver_sql("DROP TABLE IF EXISTS location_price_stats")
+        LocationPriceStats.__table__.create(conn)
+
+        self.logger.info(f"Moved listing locations into the location table: {len(location_ids)} locations")
+        return True
+
+    async def _create_search_index(self, conn: AsyncConnection):
+        exists = (
+            await conn.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'listing_fts'")
+        ).scalar()
+
+        try:
+            for statement in LISTING_FTS_DDL:
+                await conn.exec_driver_sql(statement)
+        except OperationalError as e:
+            self.logger.warning(f"Full-text search is unavailable, SQLite was built without FTS5: {e}")
+            return
+
+        if not exists:
+            # Index listings stored before the index existed
+            await conn.exec_driver_sql("INSERT INTO listing_fts (listing_fts) VALUES ('rebuild')")
+            self.logger.info("Created full-text search index")
+
+    async def backfill_dedupe_keys(self, batch_size: int = 1000):
+        """Fill the near-duplicate size bucket of listings stored before it existed."""
+        statement = (
+            update(Listing)
+            .where(Listing.id == bindparam("listing_id"))
+            .values(
+                size_bucket=bindparam("bucket"),
+                last_seen=Listing.last_seen,  # keep onupdate from touching it
+            )
+        )
+
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            total = 0
+            while True:
+                result = await session.execute(
+                    select(Listing.id, Listing.size_sqm)
+                    .where(Listing.size_bucket.is_(None), Listing.size_sqm > 0)
+                    .limit(batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+
+                connection = await session.connection()
+                await connection.execute(
+                    statement,
+                    [{"listing_id": listing_id, "bucket": size_bucket(size_sqm)} for listing_id, size_sqm in rows],
+                )
+                await session.commit()
+                total += len(rows)
+
+            if total:
+                self.logger.info(f"Backfilled near-duplicate keys for {total} listings")
+
+    async def intern_location(self, session: AsyncSession, name: str | None) -> int | None:
+        """Return the id of the location ``name`` normalizes to, inserting it in the caller's transaction if new.
+
+        Ids are cached in memory, so known locations (nearly all of them after the first crawl) cost no query.
+        """
+        key = normalize_location(name)
+        if not key:
+            return None
+
+        location_id = self.location_ids.get(key)
+        if location_id is not None:
+            return location_id
+
+        new_locations = session.info.setdefault("new_locations", {})
+        if key in new_locations:
+            return new_locations[key]
+
+        location_id = await session.scalar(select(Location.id).where(Location.key == key))
+        if location_id is not None:
+            self.location_ids[key] = location_id
+            return location_id
+
+        location = Location(key=key, name=name.strip())
+        session.add(location)
+        await session.flush()
+
+        new_locations[key] = location.id
+        session.info["location_cache"] = self.location_ids
+        return location.id
+
+    async def find_duplicate_candidates(
+        self,
+        session: AsyncSession,
+        listing_type: ListingType,
+        location_id: int,
+        bucket: int,
+        exclude_item_id: str,
+        seen_before: datetime | None = None,
+    ) -> list[Listing]:
+        """Listings in the same blocking cell (type, location, size bucket +-1) as a new listing.
+
+        With ``seen_before``, only listings last seen before then are returned.
+        """
+        query = select(Listing).where(
+            Listing.listing_type == listing_type,
+            Listing.location_id == location_id,
+            Listing.size_bucket.in_((bucket - 1, bucket, bucket + 1)),
+            Listing.item_id != exclude_item_id,
+        )
+        if seen_before is not None:
+            query = query.where(Listing.last_seen < seen_before)
+
+        result = await session.execute(query)
+        return list(result.scalars())
+
+    async def backfill_price_stats(self, batch_size: int = 1000):
+        """Build the price per m² statistics from scratch if listings exist but no statistics do yet."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            if await session.scalar(select(LocationPriceStats.location_id).limit(1)) is not None:
+                return
+            if await session.scalar(select(Listing.id).limit(1)) is None:
+                return
+
+            sketches: dict[tuple[ListingType, int], QuantileSketch] = {}
+            sums: dict[tuple[ListingType, int], float] = {}
+            rows = await session.stream(
+                select(Listing.listing_type, Listing.location_id, Listing.price, Listing.size_sqm)
+                .where(Listing.location_id.is_not(None))
+                .execution_options(yield_per=batch_size)
+            )
+            async for listing_type, location_id, price, size_sqm in rows:
+                price_per_sqm = unit_price(price, size_sqm)
+                if price_per_sqm is not None:
+                    key = (listing_type, location_id)
+                    sketches.setdefault(key, QuantileSketch()).add(price_per_sqm)
+                    sums[key] = sums.get(key, 0.0) + price_per_sqm
+
+            for (listing_type, location_id), sketch in sketches.items():
+                stats = LocationPriceStats(
+                    listing_type=listing_type,
+                    location_id=location_id,
+                    count=sketch.count,
+                    price_per_sqm_sum=sums[(listing_type, location_id)],
+                )
+                self._materialize_price_stats(stats, sketch)
+                session.add(stats)
+
+            await session.commit()
+            self.logger.info(f"Built price per m² statistics for {len(sketches)} locations")
+
+    @staticmethod
+    def _materialize_price_stats(stats: LocationPriceStats, sketch: QuantileSketch):
+        stats.sketch = sketch.to_json()
+        stats.mean_price_per_sqm = stats.price_per_sqm_sum / stats.count if stats.count else None
+        stats.p25_price_per_sqm, stats.median_price_per_sqm, stats.p75_price_per_sqm = sketch.quantiles(0.25, 0.5, 0.75)
+        stats.updated_at = datetime.now()
+
+    async def update_price_stats(
+        self,
+        session: AsyncSession,
+        listing_type: ListingType,
+        location_id: int | None,
+        added: float | None = None,
+        removed: float | None = None,
+    ) -> LocationPriceStats | None:
+        """Apply one listing's price per m² change to the statistics of its location, in the caller's transaction.
+
+        Only the row of that location is read and written, so the cost does not grow with the table.
+        """
+        if location_id is None or (added is None and removed is None):
+            return None
+
+        stats = await session.get(LocationPriceStats, (listing_type, location_id))
+        if stats is None:
+            if added is None:
+                return None
+
+            stats = LocationPriceStats(
+                listing_type=listing_type, location_id=location_id, count=0, price_per_sqm_sum=0.0
+            )
+            session.add(stats)
+
+        sketch = QuantileSketch.from_json(stats.sketch)
+
+        if removed is not None and stats.count > 0:
+            sketch.remove(removed)
+            stats.count -= 1
+            stats.price_per_sqm_sum -= removed
+
+        if added is not None:
+            sketch.add(added)
+            stats.count += 1
+            stats.price_per_sqm_sum += added
+
+        self._materialize_price_stats(stats, sketch)
+        return stats
+
     async def insert_listing(self, session: AsyncSession, listing: Listing):
         session.add(listing)
 
@@ -69,6 +471,9 @@ class DatabaseClient:
 
             return listings
 
+    async def record_price(self, session: AsyncSession, item_id: str, price: float, recorded_at: datetime):
+        session.add(PriceHistory(item_id=item_id, price=price, recorded_at=recorded_at))
+
     async def get_listing_by_id(self, session: AsyncSession, item_id: str):
         result = await session.execute(select(Listing).where(Listing.item_id == item_id))
         listing = result.scalar_one_or_none()
@@ -90,8 +495,10 @@ class DatabaseClient:
                 self.logger.info("No listings to flush.")
                 return 0
 
-            # Delete all listings
+            # Delete all listings and their price history
             result = await session.execute(delete(Listing))
+            await session.execute(delete(PriceHistory))
+            await session.execute(delete(LocationPriceStats))
             await session.commit()
 
             deleted_count = result.rowcount
@@ -148,3 +555,444 @@ class DatabaseClient:
 
             await session.commit()
             self.logger.info(f"Stored schema hash: {schema_hash}")
+
+    async def get_checkpoint(self) -> CrawlCheckpoint | None:
+        """Get the checkpoint of the last (possibly interrupted) crawl."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.execute(select(CrawlCheckpoint))
+            return result.scalar_one_or_none()
+
+    async def save_checkpoint(
+        self,
+        session: AsyncSession,
+        url_hash: str,
+        url_index: int,
+        page_num: int,
+        page_url: str | None = None,
+        completed: bool = False,
+        fresh: bool = False,
+    ):
+        """Record the position of the next page to crawl. Committed together with the caller's session."""
+        result = await session.execute(select(CrawlCheckpoint))
+        checkpoint = result.scalar_one_or_none()
+        now = datetime.now()
+
+        if checkpoint is None:
+            checkpoint = CrawlCheckpoint(started_at=now)
+            session.add(checkpoint)
+        elif fresh:
+            checkpoint.started_at = now
+
+        checkpoint.url_hash = url_hash
+        checkpoint.url_index = url_index
+        checkpoint.page_num = page_num
+        checkpoint.page_url = page_url
+        checkpoint.completed = completed
+        checkpoint.updated_at = now
+
+        await session.commit()
+        self.logger.debug(f"Checkpoint saved: url_index={url_index}, page_num={page_num}, completed={completed}")
+
+    async def get_url_circuit(self, url: str) -> UrlCircuit | None:
+        """Get the circuit breaker state of a search URL."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.execute(select(UrlCircuit).where(UrlCircuit.url == url))
+            return result.scalar_one_or_none()
+
+    async def record_url_failure(self, url: str, error: str, failure_threshold: int, cooldown: timedelta) -> UrlCircuit:
+        """Count a failed scrape of ``url`` and open its circuit once ``failure_threshold`` is reached."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.execute(select(UrlCircuit).where(UrlCircuit.url == url))
+            circuit = result.scalar_one_or_none()
+            now = datetime.now()
+
+            if circuit is None:
+                circuit = UrlCircuit(url=url, failure_count=0)
+                session.add(circuit)
+
+            circuit.failure_count += 1
+            circuit.last_error = error[:500]
+            circuit.updated_at = now
+
+            if circuit.failure_count >= failure_threshold:
+                circuit.opened_until = now + cooldown
+
+            await session.commit()
+            await session.refresh(circuit)
+            return circuit
+
+    async def record_url_success(self, url: str):
+        """Close the circuit of ``url`` after a successful scrape."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.execute(select(UrlCircuit).where(UrlCircuit.url == url))
+            circuit = result.scalar_one_or_none()
+
+            if circuit is None or circuit.failure_count == 0:
+                return
+
+            self.logger.info(f"Closing circuit for {url} after {circuit.failure_count} failures")
+            circuit.failure_count = 0
+            circuit.opened_until = None
+            circuit.last_error = None
+            circuit.updated_at = datetime.now()
+            await session.commit()
+
+    async def delete_url_circuits(self, urls: list[str]):
+        """Forget the circuit breaker state of search URLs that are no longer configured."""
+        if not urls:
+            return
+
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            await session.execute(delete(UrlCircuit).where(UrlCircuit.url.in_(urls)))
+            await session.commit()
+
+    async def get_cached_details(self, item_ids: list[str], ttl: timedelta) -> dict[str, dict]:
+        """Get cached detail page data that is younger than ``ttl``, keyed by item_id."""
+        if not item_ids:
+            return {}
+
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.execute(
+                select(ListingDetail).where(
+                    ListingDetail.item_id.in_(item_ids),
+                    ListingDetail.fetched_at > datetime.now() - ttl,
+                )
+            )
+            return {detail.item_id: detail.data for detail in result.scalars()}
+
+    async def cache_details(self, details: dict[str, dict]):
+        """Store parsed detail page data, replacing older entries."""
+        if not details:
+            return
+
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            now = datetime.now()
+            for item_id, data in details.items():
+                await session.merge(ListingDetail(item_id=item_id, data=data, fetched_at=now))
+            await session.commit()
+
+    async def listings_missing_details(
+        self, session: AsyncSession, seen_since: datetime, ttl: timedelta, limit: int
+    ) -> dict[str, str]:
+        """URLs of listings seen since ``seen_since`` that have none of the detail page fields, keyed by item_id.
+
+        Newest first. Listings whose detail page was fetched within ``ttl`` but had none of the fields are skipped.
+        """
+        fetched_empty = select(ListingDetail.item_id).where(
+            ListingDetail.item_id == Listing.item_id,
+            ListingDetail.fetched_at > datetime.now() - ttl,
+            cast(ListingDetail.data, String) == "{}",
+        )
+        result = await session.execute(
+            select(Listing.item_id, Listing.url)
+            .where(
+                Listing.last_seen >= seen_since,
+                Listing.rooms.is_(None),
+                Listing.floor.is_(None),
+                Listing.year_built.is_(None),
+                Listing.energy_class.is_(None),
+                ~fetched_empty.exists(),
+            )
+            .order_by(Listing.id.desc())
+            .limit(limit)
+        )
+        return dict(result.all())
+
+    def listings_query(
+        self,
+        listing_type: ListingType | None = None,
+        location: str | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        changed_since: datetime | None = None,
+    ) -> Select:
+        query = select(
+            Listing.item_id,
+            Listing.url,
+            Listing.listing_type,
+            Location.name.label("location"),
+            Listing.title,
+            Listing.price,
+            Listing.last_price,
+            Listing.size_sqm,
+            Listing.rooms,
+            Listing.floor,
+            Listing.year_built,
+            Listing.energy_class,
+            Listing.first_seen,
+            Listing.last_seen,
+            Listing.updated_at,
+        ).outerjoin(Listing.location)
+
+        if listing_type:
+            query = query.where(Listing.listing_type == listing_type)
+        if location:
+            query = query.where(Listing.location_id.in_(location_ids_matching(location)))
+        if date_from:
+            query = query.where(Listing.first_seen >= date_from)
+        if date_to:
+            query = query.where(Listing.first_seen < date_to)
+        if changed_since:
+            query = query.where(Listing.updated_at > changed_since)
+
+        return query.order_by(Listing.id)
+
+    def price_history_query(
+        self,
+        listing_type: ListingType | None = None,
+        location: str | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        changed_since: datetime | None = None,
+    ) -> Select:
+        query = (
+            select(
+                PriceHistory.item_id,
+                Listing.listing_type,
+                Location.name.label("location"),
+                PriceHistory.price,
+                PriceHistory.recorded_at,
+            )
+            .join(Listing, Listing.item_id == PriceHistory.item_id)
+            .outerjoin(Listing.location)
+        )
+
+        if listing_type:
+            query = query.where(Listing.listing_type == listing_type)
+        if location:
+            query = query.where(Listing.location_id.in_(location_ids_matching(location)))
+        if date_from:
+            query = query.where(PriceHistory.recorded_at >= date_from)
+        if date_to:
+            query = query.where(PriceHistory.recorded_at < date_to)
+        if changed_since:
+            query = query.where(PriceHistory.recorded_at > changed_since)
+
+        return query.order_by(PriceHistory.id)
+
+    async def listings_page(
+        self,
+        listing_type: ListingType | None = None,
+        location: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_size: float | None = None,
+        max_size: float | None = None,
+        first_seen_from: datetime | None = None,
+        first_seen_to: datetime | None = None,
+        sort: str = "first_seen",
+        after: tuple | None = None,
+        limit: int = 50,
+    ) -> list[RowMapping]:
+        """Return one page of listings using keyset pagination.
+
+        ``sort="first_seen"`` pages from the newest listing, ``sort="price"`` from the cheapest. ``after`` is the
+        (sort value, id) of the last row of the previous page, so a page continues where the previous one ended in
+        the sort order's index instead of skipping rows like an OFFSET would. The indexes are not covering, rows
+        are still read from the table, and a location matching several locations is one index range per location
+        merged by a sort of the rows past ``after``.
+        """
+        query = select(Listing.id, *self.listings_query().selected_columns).outerjoin(Listing.location)
+
+        if listing_type:
+            query = query.where(Listing.listing_type == listing_type)
+        if min_price is not None:
+            query = query.where(Listing.price >= min_price)
+        if max_price is not None:
+            query = query.where(Listing.price <= max_price)
+        if min_size is not None:
+            query = query.where(Listing.size_sqm >= min_size)
+        if max_size is not None:
+            query = query.where(Listing.size_sqm <= max_size)
+        if first_seen_from:
+            query = query.where(Listing.first_seen >= first_seen_from)
+        if first_seen_to:
+            query = query.where(Listing.first_seen < first_seen_to)
+
+        if sort == "price":
+            query = query.where(Listing.price.is_not(None))
+            if after is not None:
+                query = query.where(tuple_(Listing.price, Listing.id) > tuple_(*after))
+            query = query.order_by(Listing.price, Listing.id)
+        else:
+            if after is not None:
+                query = query.where(tuple_(Listing.first_seen, Listing.id) < tuple_(*after))
+            query = query.order_by(Listing.first_seen.desc(), Listing.id.desc())
+
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            if location:
+                # Resolved up front, SQLite only walks the (location, sort) indexes in order for a plain equality
+                location_ids = (await session.execute(location_ids_matching(location))).scalars().all()
+                if not location_ids:
+                    return []
+                if len(location_ids) == 1:
+                    query = query.where(Listing.location_id == location_ids[0])
+                else:
+                    query = query.where(Listing.location_id.in_(location_ids))
+
+            result = await session.execute(query.limit(limit))
+            return list(result.mappings())
+
+    async def search_listings(
+        self, text: str, listing_type: ListingType | None = None, limit: int = 20
+    ) -> list[RowMapping]:
+        """Full-text search over listing titles and locations, best matches first.
+
+        Words are matched as prefixes regardless of diacritics and case, and all of them have to match (see
+        ``fts_query``). Results are ranked with bm25, weighting title matches over location matches.
+        Each row also has ``highlight``, the title with the matched words in ``**bold**``.
+        """
+        match = fts_query(text)
+        if not match:
+            return []
+
+        rank = func.bm25(literal_column("listing_fts"), 2.0, 1.0)
+        highlight = func.highlight(literal_column("listing_fts"), 0, "**", "**")
+
+        query = (
+            select(*self.listings_query().selected_columns, highlight.label("highlight"), rank.label("rank"))
+            .join(listing_fts, listing_fts.c.rowid == Listing.id)
+            .outerjoin(Listing.location)
+            .where(literal_column("listing_fts").op("MATCH")(match))
+            .order_by(rank)
+            .limit(limit)
+        )
+        if listing_type:
+            query = query.where(Listing.listing_type == listing_type)
+
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.execute(query)
+            return list(result.mappings())
+
+    async def stream_rows(self, query: Select, batch_size: int = 1000) -> AsyncIterator[RowMapping]:
+        """Stream the rows of ``query`` in batches of ``batch_size`` without materializing the result."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            async for row in result.mappings():
+                yield row
+
+    async def get_export_watermark(self, name: str) -> ExportWatermark | None:
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            return await session.get(ExportWatermark, name)
+
+    async def set_export_watermark(
+        self, name: str, exported_until: datetime, row_count: int, recent_keys: list[str] | None = None
+    ):
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            await session.merge(
+                ExportWatermark(
+                    name=name,
+                    exported_until=exported_until,
+                    row_count=row_count,
+                    updated_at=datetime.now(),
+                    recent_keys=recent_keys,
+                )
+            )
+            await session.commit()
+            self.logger.info(f"Stored export watermark {name}: {exported_until}")
+
+    async def get_stats(self, top_locations: int = 10) -> dict:
+        """Aggregate listing counts and prices without loading rows into memory."""
+        session_factory = self.async_session_factory()
+        async with session_factory() as session:
+            totals = await session.execute(
+                select(
+                    func.count(Listing.id),
+                    func.min(Listing.first_seen),
+                    func.max(Listing.last_seen),
+                )
+            )
+            total, first_seen, last_seen = totals.one()
+
+            by_type = await session.execute(
+                select(
+                    Listing.listing_type,
+                    func.count(Listing.id),
+                    func.avg(Listing.price),
+                    func.avg(Listing.price / Listing.size_sqm).filter(Listing.size_sqm > 0),
+                ).group_by(Listing.listing_type)
+            )
+
+            # Counted on the location index by id; only the top rows are joined to their names
+            counts = (
+                select(Listing.location_id, func.count(Listing.id).label("count"))
+                .where(Listing.location_id.is_not(None))
+                .group_by(Listing.location_id)
+                .order_by(func.count(Listing.id).desc())
+                .limit(top_locations)
+                .subquery()
+            )
+            by_location = await session.execute(
+                select(Location.name, counts.c.count)
+                .join(counts, counts.c.location_id == Location.id)
+                .order_by(counts.c.count.desc())
+            )
+
+            price_changes = await session.execute(select(func.count(Listing.id)).where(Listing.last_price.is_not(None)))
+
+            return {
+                "total": total,
+                "first_seen": first_seen,
+                "last_seen": last_seen,
+                "price_changes": price_changes.scalar(),
+                "by_type": [
+                    {
+                        "listing_type": listing_type.value,
+                        "count": count,
+                        "avg_price": avg_price,
+                        "avg_price_per_sqm": avg_price_per_sqm,
+                    }
+                    for listing_type, count, avg_price, avg_price_per_sqm in by_type.all()
+                ],
+                "top_locations": [{"location": location, "count": count} for location, count in by_location.all()],
+            }
+
+    async def maintain(self, vacuum: bool = True) -> dict:
+        """Run SQLite housekeeping: integrity check, statistics refresh and optional VACUUM."""
+        self.logger.info("Running database maintenance ...")
+
+        engine = self.async_engine().execution_options(isolation_level="AUTOCOMMIT")
+        async with engine.connect() as conn:
+            page_size = (await conn.exec_driver_sql("PRAGMA page_size")).scalar()
+            pages_before = (await conn.exec_driver_sql("PRAGMA page_count")).scalar()
+
+            integrity = (await conn.exec_driver_sql("PRAGMA integrity_check")).scalar()
+            if integrity != "ok":
+                self.logger.error(f"Integrity check failed: {integrity}")
+            else:
+                self.logger.info("Integrity check passed")
+
+            await conn.exec_driver_sql("ANALYZE")
+            await conn.exec_driver_sql("PRAGMA optimize")
+
+            # Merge the full-text index segments written by the triggers
+            try:
+                await conn.exec_driver_sql("INSERT INTO listing_fts (listing_fts) VALUES ('optimize')")
+            except OperationalError as e:
+                self.logger.warning(f"Could not optimize the full-text search index: {e}")
+
+            if vacuum:
+                self.logger.info("Vacuuming database ...")
+                await conn.exec_driver_sql("VACUUM")
+
+            pages_after = (await conn.exec_driver_sql("PRAGMA page_count")).scalar()
+
+        result = {
+            "integrity": integrity,
+            "size_before": pages_before * page_size,
+            "size_after": pages_after * page_size,
+        }
+        self.logger.info(f"Database maintenance finished: {result}")
+        return result
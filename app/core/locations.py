@@ -0,0 +1,49 @@
+import re
+import unicodedata
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+# Abbreviations used in listings, applied to single (already folded) words
+WORD_ALIASES = {
+    "lj": "ljubljana",
+    "lju": "ljubljana",
+    "mb": "maribor",
+    "ce": "celje",
+    "kr": "kranj",
+    "kp": "koper",
+    "ng": "nova gorica",
+    "nm": "novo mesto",
+    "ms": "murska sobota",
+    "sv": "sveti",
+    "sp": "spodnji",
+    "zg": "zgornji",
+}
+
+# Spellings of a whole location that should be treated as the same place
+LOCATION_ALIASES = {
+    "ljubljana mesto": "ljubljana",
+    "koper capodistria": "koper",
+    "piran pirano": "piran",
+    "izola isola": "izola",
+}
+
+
+def fold_text(text: str) -> str:
+    """Fold case, diacritics, punctuation, whitespace and abbreviated words."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+    folded = PUNCTUATION_PATTERN.sub(" ", folded)
+    return " ".join(WORD_ALIASES.get(word, word) for word in WHITESPACE_PATTERN.split(folded) if word)
+
+
+def normalize_location(location: str | None) -> str | None:
+    """Fold case, diacritics, punctuation, whitespace and known aliases.
+
+    E.g. "LJ.  Bežigrad" and "Ljubljana Bežigrad" both become "ljubljana bezigrad".
+    """
+    if not location:
+        return None
+
+    folded = fold_text(location)
+    return LOCATION_ALIASES.get(folded, folded) or None
@@ -4,16 +4,21 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
+    JSON,
+    Boolean,
     Column,
     DateTime,
     Enum,
     Float,
+    ForeignKey,
+    Index,
     Integer,
     MetaData,
     String,
+    Table,
     func,
 )
-from sqlalchemy.orm import Mapped, declarative_base
+from sqlalchemy.orm import Mapped, declarative_base, relationship
 
 meta = MetaData()
 Base = declarative_base(metadata=meta)
@@ -29,11 +34,43 @@ def get_model_hash() -> str:
     return hashlib.md5(schema_string.encode()).hexdigest()
 
 
+SIZE_BUCKET_SQM = 5
+
+
+def unit_price(price: Optional[float], size_sqm: Optional[float]) -> Optional[float]:
+    """Price per m², for both selling prices and monthly rents."""
+    if not price or price <= 0 or not size_sqm or size_sqm <= 0:
+        return None
+    return price / size_sqm
+
+
+def size_bucket(size_sqm: Optional[float]) -> Optional[int]:
+    """Bucket sizes into SIZE_BUCKET_SQM wide bins for near-duplicate blocking."""
+    if not size_sqm or size_sqm <= 0:
+        return None
+    return int(size_sqm // SIZE_BUCKET_SQM)
+
+
 class ListingType(str, enum.Enum):
     selling = "selling"
     renting = "renting"
 
 
+class Location(Base):
+    """A place, stored once and referenced by listings through its id."""
+
+    __tablename__ = "location"
+
+    id: Mapped[int] = Column(Integer, primary_key=True, autoincrement=True)
+    # normalize_location() of the name, so different spellings of a place share one row
+    key: Mapped[str] = Column(String(200), unique=True, nullable=False)
+    # The spelling it was first seen with
+    name: Mapped[str] = Column(String(200), nullable=False)
+
+    def __repr__(self):
+        return f"<Location(id={self.id}, key={self.key})>"
+
+
 class Listing(Base):
     __tablename__ = "listing"
 
@@ -41,7 +78,8 @@ class Listing(Base):
     item_id: Mapped[str] = Column(String(50), unique=True, index=True)
     url: Mapped[str] = Column(String(150), unique=True)
     listing_type: Mapped[ListingType] = Column(Enum(ListingType))
-    location: Mapped[Optional[str]] = Column(String(200), nullable=True)
+    location_id: Mapped[Optional[int]] = Column(Integer, ForeignKey("location.id"), nullable=True)
+    title: Mapped[Optional[str]] = Column(String(300), nullable=True)
 
     # Price tracking
     price: Mapped[float] = Column(Float)
@@ -50,10 +88,38 @@ class Listing(Base):
     # Size tracking
     size_sqm: Mapped[Optional[float]] = Column(Float, nullable=True)
 
+    # Detail page enrichment
+    rooms: Mapped[Optional[float]] = Column(Float, nullable=True)
+    floor: Mapped[Optional[str]] = Column(String(20), nullable=True)
+    year_built: Mapped[Optional[int]] = Column(Integer, nullable=True)
+    energy_class: Mapped[Optional[str]] = Column(String(5), nullable=True)
+
+    # Near-duplicate detection: blocking key part (with location_id) and the item_id of the original listing
+    size_bucket: Mapped[Optional[int]] = Column(Integer, nullable=True)
+    duplicate_of: Mapped[Optional[str]] = Column(String(50), nullable=True)
+
     # Timestamps
     first_seen: Mapped[datetime] = Column(DateTime, default=func.now())
     last_seen: Mapped[datetime] = Column(DateTime, default=func.now(), onupdate=func.now())
     accessed_time: Mapped[datetime] = Column(DateTime)
+    # Last insert or change of an exported column, unlike last_seen not bumped by every sighting
+    updated_at: Mapped[Optional[datetime]] = Column(DateTime, nullable=True)
+
+    location: Mapped[Optional[Location]] = relationship(lazy="joined")
+
+    __table_args__ = (
+        # Location first, so it also serves filtering and grouping by location
+        Index("ix_listing_location_block", "location_id", "listing_type", "size_bucket"),
+        # Keyset pagination of the query API; SQLite appends the rowid (id) to every index entry
+        Index("ix_listing_first_seen", "first_seen"),
+        Index("ix_listing_type_first_seen", "listing_type", "first_seen"),
+        Index("ix_listing_price", "price"),
+        Index("ix_listing_type_price", "listing_type", "price"),
+        Index("ix_listing_location_first_seen", "location_id", "first_seen"),
+        Index("ix_listing_location_price", "location_id", "price"),
+        # Incremental exports
+        Index("ix_listing_updated_at", "updated_at"),
+    )
 
     @property
     def price_per_sqm(self) -> Optional[float]:
@@ -65,6 +131,58 @@ class Listing(Base):
         return f"<Listing(id={self.item_id}, price={self.price}, type={self.listing_type.value})>"
 
 
+# Full-text index over listing titles and location names. It is an external content table over the
+# listing_search view, so it stores only the index itself; triggers keep it in sync with the listing table.
+# unicode61 with remove_diacritics folds č/š/ž (and other diacritics) in both documents and queries, so
+# "bezigrad" finds "Bežigrad". Location names never change, so only listing changes need re-indexing.
+LISTING_FTS_DDL = (
+    """
+    CREATE VIEW IF NOT EXISTS listing_search AS
+    SELECT listing.id, listing.title, location.name AS location
+    FROM listing LEFT JOIN location ON location.id = listing.location_id
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS listing_fts USING fts5(
+        title, location, content='listing_search', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS listing_fts_insert AFTER INSERT ON listing BEGIN
+        INSERT INTO listing_fts (rowid, title, location)
+        VALUES (new.id, new.title, (SELECT name FROM location WHERE id = new.location_id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS listing_fts_delete AFTER DELETE ON listing BEGIN
+        INSERT INTO listing_fts (listing_fts, rowid, title, location)
+        VALUES ('delete', old.id, old.title, (SELECT name FROM location WHERE id = old.location_id));
+    END
+    """,
+    # Only re-index when the indexed columns change, not on every last_seen update
+    """
+    CREATE TRIGGER IF NOT EXISTS listing_fts_update AFTER UPDATE OF title, location_id ON listing BEGIN
+        INSERT INTO listing_fts (listing_fts, rowid, title, location)
+        VALUES ('delete', old.id, old.title, (SELECT name FROM location WHERE id = old.location_id));
+        INSERT INTO listing_fts (rowid, title, location)
+        VALUES (new.id, new.title, (SELECT name FROM location WHERE id = new.location_id));
+    END
+    """,
+)
+
+# Dropped before the search index is recreated, e.g. by the location migration
+LISTING_FTS_OBJECTS = (
+    ("trigger", "listing_fts_insert"),
+    ("trigger", "listing_fts_delete"),
+    ("trigger", "listing_fts_update"),
+    ("table", "listing_fts"),
+    ("view", "listing_search"),
+)
+
+# For joins in queries only, on its own MetaData so create_all leaves the virtual table to the DDL above
+listing_fts = Table("listing_fts", MetaData(), Column("rowid", Integer))
+
+
 class ConfigState(Base):
     __tablename__ = "config_state"
 
@@ -72,3 +190,83 @@ class ConfigState(Base):
     url_hash = Column(String, nullable=True)
     schema_hash = Column(String, nullable=True)
     updated_at = Column(DateTime, nullable=False)
+
+
+class CrawlCheckpoint(Base):
+    __tablename__ = "crawl_checkpoint"
+
+    id = Column(Integer, primary_key=True)
+    url_hash = Column(String, nullable=False)
+
+    # Position of the next page to crawl
+    url_index = Column(Integer, nullable=False, default=0)
+    page_num = Column(Integer, nullable=False, default=1)
+    page_url = Column(String, nullable=True)
+
+    completed = Column(Boolean, nullable=False, default=False)
+    started_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class UrlCircuit(Base):
+    __tablename__ = "url_circuit"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String, unique=True, nullable=False)
+    failure_count = Column(Integer, nullable=False, default=0)
+    opened_until = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
+
+    def is_open(self, now: datetime) -> bool:
+        return self.opened_until is not None and self.opened_until > now
+
+
+class ListingDetail(Base):
+    __tablename__ = "listing_detail"
+
+    item_id = Column(String(50), primary_key=True)
+    data = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime, nullable=False)
+
+
+class PriceHistory(Base):
+    __tablename__ = "price_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    item_id = Column(String(50), nullable=False, index=True)
+    price = Column(Float, nullable=False)
+    recorded_at = Column(DateTime, nullable=False, index=True)
+
+
+class ExportWatermark(Base):
+    __tablename__ = "export_watermark"
+
+    name = Column(String, primary_key=True)
+    exported_until = Column(DateTime, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    # Keys of the exported rows stamped within the overlap window, skipped when the next export re-reads them
+    recent_keys = Column(JSON, nullable=True)
+
+
+class LocationPriceStats(Base):
+    """Price per m² statistics per location and listing type, maintained incrementally by the crawler."""
+
+    __tablename__ = "location_price_stats"
+
+    listing_type = Column(Enum(ListingType), primary_key=True)
+    location_id = Column(Integer, ForeignKey("location.id"), primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    price_per_sqm_sum = Column(Float, nullable=False, default=0.0)
+
+    # Materialized from the sketch on every update, so they can be queried directly
+    mean_price_per_sqm = Column(Float, nullable=True)
+    p25_price_per_sqm = Column(Float, nullable=True)
+    median_price_per_sqm = Column(Float, nullable=True)
+    p75_price_per_sqm = Column(Float, nullable=True)
+
+    # QuantileSketch buckets of price per m²
+    sketch = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,65 @@
+import math
+
+
+class QuantileSketch:
+    """Streaming quantile estimate over positive values with a bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so any quantile is within ``relative_accuracy`` of the
+    exact value. Unlike sampling sketches, values can also be removed again, e.g. when a price changes.
+    """
+
+    def __init__(self, buckets: dict[int, int] | None = None, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = buckets or {}
+
+    @classmethod
+    def from_json(cls, data: dict[str, int] | None) -> "QuantileSketch":
+        return cls({int(index): count for index, count in (data or {}).items()})
+
+    def to_json(self) -> dict[str, int]:
+        return {str(index): count for index, count in sorted(self.buckets.items())}
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def bucket(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value: float):
+        index = self.bucket(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def remove(self, value: float):
+        index = self.bucket(value)
+        if index not in self.buckets:
+            return
+
+        self.buckets[index] -= 1
+        if self.buckets[index] <= 0:
+            del self.buckets[index]
+
+    def quantiles(self, *qs: float) -> list[float | None]:
+        """Estimate several quantiles (in ascending order) in one pass over the buckets."""
+        count = self.count
+        if count == 0:
+            return [None] * len(qs)
+
+        estimates = []
+        buckets = iter(sorted(self.buckets.items()))
+        seen = 0
+        index = None
+
+        for q in qs:
+            rank = q * (count - 1)
+            while seen <= rank:
+                index, bucket_count = next(buckets)
+                seen += bucket_count
+            # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+            estimates.append(2 * self.gamma**index / (self.gamma + 1))
+
+        return estimates
+
+    def quantile(self, q: float) -> float | None:
+        return self.quantiles(q)[0]
@@ -0,0 +1,224 @@
+import asyncio
+import base64
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from http import HTTPStatus
+from logging import Logger
+from urllib.parse import parse_qs, urlsplit
+
+from app.core.config import ApiConfig, get_config
+from app.core.database import DatabaseClient, on_listings_committed
+from app.core.models import ListingType
+from app.services.export import LISTING_COLUMNS, to_record
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """LRU cache of encoded responses whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, body: bytes):
+        self.entries[key] = (time.monotonic() + self.ttl, body)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def encode_cursor(sort_value, listing_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort_value, listing_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        sort_value, listing_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort == "first_seen":
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(listing_id)
+    except (ValueError, TypeError) as e:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid cursor: {e}") from None
+
+
+def parse_param(params: dict[str, list[str]], name: str, convert=str):
+    if name not in params:
+        return None
+
+    try:
+        return convert(params[name][-1])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid value for {name}: {params[name][-1]!r}") from None
+
+
+class QueryApi:
+    """Read-only JSON API over the listing table.
+
+    Runs on its own read-only database connection, so with the database in WAL mode queries never
+    block crawler writes. Responses are cached until they expire or the crawler commits listing changes.
+
+    GET /listings   filtered listings, newest first or cheapest first, with keyset pagination
+    GET /search     full-text search over titles and locations, best matches first
+    GET /stats      aggregate statistics, see ``DatabaseClient.get_stats``
+    GET /health     liveness check
+    """
+
+    def __init__(self, config: ApiConfig, logger: Logger):
+        self.config = config
+        self.logger = logger.getChild("api")
+        self.db_client = DatabaseClient(url=get_config().database.read_only_url, logger=self.logger)
+        self.cache = ResponseCache(config.cache_size, config.cache_ttl_seconds)
+        self.server: asyncio.Server | None = None
+
+        on_listings_committed(self.cache.clear)
+
+        self.routes = {
+            "/listings": self.listings,
+            "/search": self.search,
+            "/stats": self.stats,
+        }
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.config.host, self.config.port)
+        self.logger.info(f"Query API listening on http://{self.config.host}:{self.config.port}")
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.db_client.cleanup()
+        self.logger.info(f"Query API stopped (cache hits: {self.cache.hits}, misses: {self.cache.misses})")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+            # Headers are not used, but have to be read before answering
+            while (await asyncio.wait_for(reader.readline(), timeout=10)).strip():
+                pass
+
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            status, body = await self.dispatch(method, target)
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            status, body = HTTPStatus.BAD_REQUEST, json.dumps({"error": "Malformed request"}).encode()
+
+        try:
+            writer.write(
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, target: str) -> tuple[HTTPStatus, bytes]:
+        url = urlsplit(target)
+
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, json.dumps({"error": "Only GET is supported"}).encode()
+
+        if url.path == "/health":
+            return HTTPStatus.OK, b'{"status": "ok"}'
+
+        handler = self.routes.get(url.path.rstrip("/"))
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, json.dumps({"error": f"Unknown path: {url.path}"}).encode()
+
+        params = parse_qs(url.query)
+        cache_key = f"{url.path.rstrip('/')}?{sorted(params.items())}"
+
+        if (body := self.cache.get(cache_key)) is not None:
+            return HTTPStatus.OK, body
+
+        try:
+            result = await handler(params)
+        except ApiError as e:
+            return e.status, json.dumps({"error": str(e)}).encode()
+        except Exception as e:
+            self.logger.error(f"Query API request {target} failed: {e}", exc_info=True)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({"error": "Internal error"}).encode()
+
+        body = json.dumps(result, default=datetime.isoformat, ensure_ascii=False).encode()
+        self.cache.put(cache_key, body)
+        return HTTPStatus.OK, body
+
+    async def listings(self, params: dict[str, list[str]]) -> dict:
+        sort = parse_param(params, "sort") or "first_seen"
+        if sort not in ("first_seen", "price"):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "sort must be first_seen or price")
+
+        limit = parse_param(params, "limit", int) or self.config.default_limit
+        limit = max(1, min(limit, self.config.max_limit))
+
+        cursor = parse_param(params, "cursor")
+        rows = await self.db_client.listings_page(
+            listing_type=parse_param(params, "type", ListingType),
+            location=parse_param(params, "location"),
+            min_price=parse_param(params, "min_price", float),
+            max_price=parse_param(params, "max_price", float),
+            min_size=parse_param(params, "min_size", float),
+            max_size=parse_param(params, "max_size", float),
+            first_seen_from=parse_param(params, "first_seen_from", datetime.fromisoformat),
+            first_seen_to=parse_param(params, "first_seen_to", datetime.fromisoformat),
+            sort=sort,
+            after=decode_cursor(cursor, sort) if cursor else None,
+            limit=limit,
+        )
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1][sort], rows[-1]["id"])
+
+        return {"items": [to_record(row, LISTING_COLUMNS) for row in rows], "next_cursor": next_cursor}
+
+    async def search(self, params: dict[str, list[str]]) -> dict:
+        text = parse_param(params, "q")
+        if not text:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "q is required")
+
+        limit = parse_param(params, "limit", int) or self.config.default_limit
+        rows = await self.db_client.search_listings(
+            text,
+            listing_type=parse_param(params, "type", ListingType),
+            limit=max(1, min(limit, self.config.max_limit)),
+        )
+        return {"items": [{**to_record(row, LISTING_COLUMNS), "highlight": row["highlight"]} for row in rows]}
+
+    async def stats(self, params: dict[str, list[str]]) -> dict:
+        return await self.db_client.get_stats(top_locations=parse_param(params, "top", int) or 10)
+
+
+async def start_api(logger: Logger) -> QueryApi:
+    api = QueryApi(get_config().api, logger)
+    await api.start()
+    return api
@@ -0,0 +1,100 @@
+from logging import Logger
+from pathlib import Path
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+from app.core.config import get_config
+from app.services.source import PageSource
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class BrowserSession:
+    """A browser context for one URL worker, reusing a single page across pagination.
+
+    Cookies (including the cookie consent) and local storage are loaded from ``browser.storage_state_path``, and
+    saved back once the consent banner was handled, so it only has to be dismissed once. The page
+    is replaced after ``browser.recycle_after_pages`` navigations, or on request after an error.
+    """
+
+    def __init__(self, browser: Browser, source: PageSource, logger: Logger):
+        self.browser = browser
+        self.source = source
+        self.logger = logger.getChild("browser")
+
+        browser_config = get_config().browser
+        self.storage_state_path = Path(browser_config.storage_state_path)
+        self.consent_cookie = browser_config.consent_cookie
+        self.recycle_after_pages = browser_config.recycle_after_pages
+
+        # Replayed pages must not overwrite the real session state
+        self.persist_state = source.live
+
+        self.context: BrowserContext | None = None
+        self.browser_page: Page | None = None
+        self.pages_served = 0
+        self.consent_handled = False
+
+    async def __aenter__(self) -> "BrowserSession":
+        storage_state = None
+        if self.persist_state and self.storage_state_path.exists():
+            storage_state = str(self.storage_state_path)
+
+        try:
+            self.context = await self.browser.new_context(user_agent=USER_AGENT, storage_state=storage_state)
+        except Exception as e:
+            self.logger.warning(f"Could not restore browser storage state, starting fresh: {e}")
+            self.context = await self.browser.new_context(user_agent=USER_AGENT)
+            storage_state = None
+
+        # The file alone does not mean the banner was dismissed, any earlier context may have saved it
+        if storage_state is not None:
+            cookies = await self.context.cookies()
+            self.consent_handled = any(cookie["name"] == self.consent_cookie for cookie in cookies)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            # A context that never got past the banner would only replace a good state with one without consent
+            if self.persist_state and self.consent_handled:
+                await self.save_state()
+        finally:
+            await self.context.close()
+
+    async def save_state(self):
+        self.storage_state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.storage_state_path.with_suffix(".tmp")
+
+        try:
+            await self.context.storage_state(path=str(tmp_path))
+            tmp_path.replace(self.storage_state_path)
+            self.logger.debug(f"Saved browser storage state to {self.storage_state_path}")
+        except Exception as e:
+            self.logger.warning(f"Failed to save browser storage state: {e}")
+
+    async def page(self) -> Page:
+        """Return the page for the next navigation, replacing it once it has served enough pages."""
+        if self.browser_page is not None and self.pages_served >= self.recycle_after_pages:
+            self.logger.debug(f"Recycling browser page after {self.pages_served} pages")
+            await self.recycle()
+
+        if self.browser_page is None:
+            self.browser_page = await self.context.new_page()
+            await self.source.attach(self.browser_page)
+            self.pages_served = 0
+
+        self.pages_served += 1
+        return self.browser_page
+
+    async def recycle(self):
+        """Drop the current page, e.g. when it may be left mid-navigation or crashed."""
+        if self.browser_page is None:
+            return
+
+        try:
+            await self.browser_page.close()
+        except Exception as e:
+            self.logger.debug(f"Failed to close browser page: {e}")
+
+        self.browser_page = None
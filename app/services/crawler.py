@@ -1,16 +1,31 @@
 import asyncio
 import hashlib
 import sys
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from logging import Logger
 
-from playwright.async_api import async_playwright
+from playwright.async_api import BrowserContext, async_playwright
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import config
+from app.core.config import get_config
 from app.core.database import DatabaseClient
-from app.core.models import Listing, ListingType, get_model_hash
-from app.services.notify import send_discord_error, send_discord_notifications
-from app.services.parse import parse_page
+from app.core.models import Listing, ListingType, LocationPriceStats, get_model_hash, size_bucket, unit_price
+from app.services.browser import BrowserSession
+from app.services.dedupe import find_original
+from app.services.enrich import DETAIL_FIELDS, RateLimiter, detail_rate_limiter, enrich_listings
+from app.services.notify import DISCORD_TIMEOUT, notify_stage, send_discord_error
+from app.services.parse import dismiss_cookie_banner, has_next_page, parse_page
+from app.services.pipeline import END, FLUSH, PipelineQueue, PipelineStats, run_stages
+from app.services.retry import retry_with_backoff
+from app.services.source import PageSource, create_page_source
+
+# Detail pages fetched and committed together; a cut short run loses at most one batch
+ENRICH_BATCH_SIZE = 20
+
+# How long a cancelled run waits for the notifier to send its digest, in seconds: one webhook upload and the pause
+# after it. The scheduler's timeout leaves room for this (see ``TIMEOUT_BUFFER``).
+DIGEST_TIMEOUT = DISCORD_TIMEOUT + 5
 
 
 def determine_listing_type(url: str) -> ListingType:
@@ -23,7 +38,7 @@ def determine_listing_type(url: str) -> ListingType:
 
 
 async def read_urls(logger: Logger):
-    urls = config.urls
+    urls = get_config().urls
 
     if not urls:
         logger.error("No URLs configured in config.yaml")
@@ -53,7 +68,7 @@ async def check_and_handle_url_changes(urls: list[str], db_client: DatabaseClien
         logger.warning(f"Stored hash: {stored_hash}")
         logger.warning(f"Current hash: {current_hash}")
 
-        if config.database.auto_flush:
+        if get_config().database.auto_flush:
             deleted_count = await db_client.flush_listings()
             logger.info(f"Flushed {deleted_count} listings due to URL change")
         else:
@@ -91,142 +106,504 @@ async def check_schema_changes(db_client: DatabaseClient, logger: Logger) -> boo
     return False
 
 
-async def scrape_url(browser, page_url, db_client: DatabaseClient, logger: Logger):
-    logger.info(f"Scraping: {page_url}")
+async def enrich_new_listings(
+    context: BrowserContext,
+    source: PageSource,
+    events: dict[str, dict],
+    db_client: DatabaseClient,
+    session: AsyncSession,
+    rate_limiter: RateLimiter,
+    logger: Logger,
+):
+    """Add detail page data to freshly inserted listings and their notification events."""
+    try:
+        details = await enrich_listings(
+            context,
+            source,
+            {item_id: event["url"] for item_id, event in events.items()},
+            db_client,
+            rate_limiter,
+            logger,
+        )
+    except Exception as e:
+        logger.error(f"Failed to enrich listings: {e}", exc_info=True)
+        return
 
+    for item_id, data in details.items():
+        listing = await db_client.get_listing_by_id(session, item_id)
+        if listing is None:
+            continue
+
+        for field in DETAIL_FIELDS:
+            if data.get(field) is not None:
+                setattr(listing, field, data[field])
+                events[item_id][field] = data[field]
+        listing.updated_at = datetime.now()
+
+    await session.commit()
+
+
+def build_page_url(page_url: str, page_num: int) -> str:
+    """Build the URL of the ``page_num``-th results page of a search."""
+    if page_num == 1:
+        return page_url
+
+    # Split URL into base and query string
+    if "?" in page_url:
+        base_url, query_string = page_url.split("?", 1)
+        return f"{base_url}{page_num}/?{query_string}"
+    return f"{page_url}{page_num}/"
+
+
+def local_price_fields(stats: LocationPriceStats | None) -> dict:
+    """Local price per m² context for a notification, taken from the statistics row the update just loaded."""
+    if stats is None:
+        return {}
+    return {"local_median_price_per_sqm": stats.median_price_per_sqm, "local_listing_count": stats.count}
+
+
+async def reconcile_listing(
+    session: AsyncSession,
+    db_client: DatabaseClient,
+    page_url: str,
+    item_id: str,
+    data: dict,
+    logger: Logger,
+    run_started: datetime | None = None,
+) -> dict | None:
+    """Insert or update one scraped listing and return the change event to notify about, if any."""
+    dedupe_config = get_config().dedupe
+
+    existing = await db_client.get_listing_by_id(session, item_id)
+
+    if existing:
+        # Listings stored before titles were kept pick theirs up on the next sighting
+        if data.get("title") and existing.title != data["title"]:
+            existing.title = data["title"]
+            existing.updated_at = datetime.now()
+
+        # Check for price change
+        if existing.price != data["price"]:
+            logger.info(f"Price change detected for {item_id}: {existing.price} -> {data['price']}")
+            stats = await db_client.update_price_stats(
+                session,
+                existing.listing_type,
+                existing.location_id,
+                added=unit_price(data["price"], existing.size_sqm),
+                removed=unit_price(existing.price, existing.size_sqm),
+            )
+            existing.last_price = existing.price
+            existing.price = data["price"]
+            existing.last_seen = datetime.now()
+            existing.accessed_time = datetime.now()
+            existing.updated_at = existing.last_seen
+            await db_client.record_price(session, item_id, data["price"], existing.last_seen)
+
+            return {
+                "item_id": item_id,
+                "url": data["url"],
+                "price": data["price"],
+                "old_price": existing.last_price,
+                "type": "price_change",
+                "listing_type": existing.listing_type.value,
+                "location": existing.location.name if existing.location else data.get("location"),
+                "size_sqm": existing.size_sqm,
+                "source_url": page_url,
+                **local_price_fields(stats),
+            }
+
+        existing.last_seen = datetime.now()
+        existing.accessed_time = datetime.now()
+        return None
+
+    # New listing
+    logger.info(f"New listing found: {item_id}")
+    now = datetime.now()
+
+    new_listing = Listing(
+        item_id=item_id,
+        url=data["url"],
+        listing_type=determine_listing_type(page_url),
+        price=data["price"],
+        last_price=None,
+        size_sqm=data.get("size_sqm"),
+        location_id=await db_client.intern_location(session, data.get("location")),
+        title=data.get("title"),
+        size_bucket=size_bucket(data.get("size_sqm")),
+        first_seen=now,
+        last_seen=now,
+        accessed_time=now,
+        updated_at=now,
+    )
+
+    original = None
+    if dedupe_config.enabled:
+        original = await find_original(session, db_client, new_listing, logger, run_started)
+        if original:
+            logger.info(f"Listing {item_id} looks like a repost of {original.item_id}")
+            new_listing.duplicate_of = original.item_id
+
+    await db_client.insert_listing(session, new_listing)
+    await db_client.record_price(session, item_id, data["price"], now)
+    stats = await db_client.update_price_stats(
+        session,
+        new_listing.listing_type,
+        new_listing.location_id,
+        added=unit_price(new_listing.price, new_listing.size_sqm),
+    )
+
+    event = {
+        "item_id": item_id,
+        "url": data["url"],
+        "price": data["price"],
+        "old_price": None,
+        "type": "new",
+        "listing_type": determine_listing_type(page_url).value,
+        "location": data.get("location"),
+        "size_sqm": data.get("size_sqm"),
+        "source_url": page_url,
+        **local_price_fields(stats),
+    }
+
+    if original:
+        event["duplicate_of"] = original.item_id
+        event["original_url"] = original.url
+        event["original_price"] = original.price
+
+        if dedupe_config.notify == "suppress":
+            return None
+
+    return event
+
+
+async def fetch_stage(
+    browser_session: BrowserSession,
+    source: PageSource,
+    page_url: str,
+    start_page: int,
+    output: PipelineQueue,
+    stop: asyncio.Event,
+    stats: PipelineStats,
+    logger: Logger,
+):
+    """Navigate the result pages of ``page_url`` and pass their HTML on, until pagination ends."""
+    app_config = get_config().app
+    page_num = start_page
+
+    try:
+        while not stop.is_set():
+            current_url = build_page_url(page_url, page_num)
+            logger.info(f"Navigating to page {page_num}: {current_url}")
+
+            async def fetch_page():
+                browser_page = await browser_session.page()
+
+                async with stats.busy("fetch"):
+                    start = time.perf_counter()
+                    await source.goto(browser_page, current_url)
+                    logger.debug(f"Page {page_num} navigation took {time.perf_counter() - start:.2f}s")
+
+                await source.settle(2)
+
+                if not browser_session.consent_handled:
+                    browser_session.consent_handled = await dismiss_cookie_banner(browser_page, logger)
+
+                return await browser_page.content(), await has_next_page(browser_page)
+
+            html, has_more = await retry_with_backoff(
+                fetch_page,
+                logger,
+                attempts=app_config.page_retries,
+                base_delay=app_config.retry_base_delay,
+                max_delay=app_config.retry_max_delay,
+                description=f"Page {page_num}",
+                # Replace a page that may be left mid-navigation or crashed before retrying
+                on_retry=browser_session.recycle,
+            )
+            await output.put((page_num, html))
+
+            if not has_more:
+                logger.info(f"No more pages available after page {page_num}, stopping pagination")
+                break
+
+            if page_num >= app_config.max_pages_per_url:
+                logger.warning(
+                    f"Available pages exceed configured maximum of: {app_config.max_pages_per_url}, stopping pagination"
+                )
+                break
+
+            page_num += 1
+            await source.settle(10)  # Longer delay between pages
+    except Exception:
+        # Let the later stages finish the pages fetched so far before the error ends the URL
+        await output.put(END)
+        raise
+
+    await output.put(END)
+
+
+async def parse_stage(
+    browser_session: BrowserSession,
+    input_queue: PipelineQueue,
+    output: PipelineQueue,
+    stop: asyncio.Event,
+    stats: PipelineStats,
+    logger: Logger,
+):
+    """Parse fetched HTML on a dedicated offline page, so the fetch page can move on to the next URL."""
+    parse_browser_page = None
+
+    try:
+        parse_browser_page = await browser_session.context.new_page()
+        # The DOM is all we need, keep images, scripts and trackers of the copy off the network
+        await parse_browser_page.route("**/*", lambda route: route.abort())
+
+        while (item := await input_queue.get()) is not END:
+            # Keep draining after the last page so the fetch stage never blocks on a full queue
+            if stop.is_set():
+                continue
+
+            page_num, html = item
+            async with stats.busy("parse"):
+                await parse_browser_page.set_content(html)
+                listings, _ = await parse_page(parse_browser_page, logger, dismiss_cookies=False)
+            logger.info(f"Found {len(listings)} listings on page {page_num}")
+
+            if not listings:
+                logger.info(f"No more listings on page {page_num}, stopping pagination")
+                stop.set()
+                continue
+
+            await output.put((page_num, listings))
+    except Exception:
+        await output.put(END)
+        raise
+    finally:
+        if parse_browser_page is not None:
+            await parse_browser_page.close()
+
+    await output.put(END)
+
+
+async def reconcile_stage(
+    session: AsyncSession,
+    db_client: DatabaseClient,
+    page_url: str,
+    url_hash: str,
+    url_index: int,
+    input_queue: PipelineQueue,
+    publish,
+    stats: PipelineStats,
+    logger: Logger,
+    run_started: datetime | None = None,
+):
+    """Reconcile parsed listings with the database, publishing each change event once its listing is committed."""
+    while (item := await input_queue.get()) is not END:
+        page_num, listings = item
+
+        # Check each listing against database
+        for item_id, data in listings.items():
+            async with stats.busy("reconcile"):
+                try:
+                    event = await reconcile_listing(session, db_client, page_url, item_id, data, logger, run_started)
+                    await session.commit()
+                except Exception as e:
+                    await session.rollback()
+                    logger.error(f"Failed to save listing {item_id}: {e}", exc_info=True)
+                    continue
+
+            if event is not None:
+                # Outside the busy window, so waiting on a slow notifier shows up as backpressure instead
+                await publish(event)
+
+        async with stats.busy("reconcile"):
+            # Page is fully committed, checkpoint the next one
+            await db_client.save_checkpoint(session, url_hash, url_index, page_num + 1, page_url)
+
+        await publish(FLUSH)
+
+
+async def enrich_stage(
+    browser,
+    source: PageSource,
+    db_client: DatabaseClient,
+    input_queue: PipelineQueue,
+    notify_queue: PipelineQueue,
+    stats: PipelineStats,
+    run_started: datetime,
+    logger: Logger,
+):
+    """Add detail page data to new listings and pass their events on to the notify stage.
+
+    One stage serves the whole crawl, so the rate-limited detail pages never hold up reconciling or the next URL.
+    Once the crawl is done, listings of this run that still have no details, because a fetch failed or an earlier
+    run was cut short, are fetched again, up to half an interval's worth of requests per run. If the stage is
+    cancelled, the events of the batch in progress are passed on without details.
+    """
+    e_logger = logger.getChild("enrich")
+    rate_limiter = detail_rate_limiter(source)
+    session_factory = db_client.async_session_factory()
+    events = {}
+    attempted = set()
+
+    async def enrich(batch: dict[str, dict]):
+        async with stats.busy("enrich"):
+            await enrich_new_listings(
+                browser_session.context, source, batch, db_client, session, rate_limiter, e_logger
+            )
+        attempted.update(batch)
+
+    try:
+        async with session_factory() as session, BrowserSession(browser, source, e_logger) as browser_session:
+            ended = False
+            while not ended:
+                # Whatever was queued meanwhile, so the worker pool stays busy across result pages
+                items = [await input_queue.get(), *input_queue.drain(ENRICH_BATCH_SIZE - 1)]
+                ended = any(item is END for item in items)
+                events = {event["item_id"]: event for event in items if event is not END}
+                if not events:
+                    continue
+
+                await enrich(events)
+                for item_id in list(events):
+                    await notify_queue.put(events.pop(item_id))
+                await notify_queue.put(FLUSH)
+
+            config = get_config()
+            limit = max(
+                ENRICH_BATCH_SIZE, config.enrichment.requests_per_minute * config.scheduler.interval_minutes // 2
+            )
+            ttl = timedelta(hours=config.enrichment.cache_ttl_hours)
+            missing = await db_client.listings_missing_details(session, run_started, ttl, limit + len(attempted))
+            missing = [(item_id, url) for item_id, url in missing.items() if item_id not in attempted][:limit]
+            if missing:
+                e_logger.info(f"Fetching details of {len(missing)} listings that are still missing them")
+
+            for start in range(0, len(missing), ENRICH_BATCH_SIZE):
+                await enrich({item_id: {"url": url} for item_id, url in missing[start : start + ENRICH_BATCH_SIZE]})
+    finally:
+        # Committed listings are notified even if their details never arrive
+        for event in events.values():
+            await notify_queue.put(event)
+
+
+async def report_url_failure(db_client: DatabaseClient, page_url: str, error_message: str, logger: Logger):
+    """Count a failed scrape towards the URL's circuit breaker and send the error notification, if enabled."""
+    app_config = get_config().app
+
+    circuit = await db_client.record_url_failure(
+        page_url,
+        error_message,
+        failure_threshold=app_config.circuit_failure_threshold,
+        cooldown=timedelta(minutes=app_config.circuit_cooldown_minutes),
+    )
+    if circuit.is_open(datetime.now()):
+        logger.warning(
+            f"Circuit opened for {page_url} after {circuit.failure_count} consecutive failures, "
+            f"skipping it until {circuit.opened_until:%Y-%m-%d %H:%M:%S}"
+        )
+        error_message += f"\n\nURL skipped until {circuit.opened_until:%Y-%m-%d %H:%M:%S}"
+
+    if get_config().discord.notify_on_error:
+        send_discord_error(error_message, logger.getChild("discord"), page_url)
+
+
+async def scrape_url(
+    browser,
+    page_url,
+    db_client: DatabaseClient,
+    logger: Logger,
+    url_hash: str,
+    url_index: int = 0,
+    start_page: int = 1,
+    source: PageSource | None = None,
+    notify_queue: PipelineQueue | None = None,
+    stats: PipelineStats | None = None,
+    enrich_queue: PipelineQueue | None = None,
+    run_started: datetime | None = None,
+):
+    """Crawl one search URL through the fetch -> parse -> reconcile pipeline.
+
+    Page N+1 is fetched while page N is parsed and reconciled. Change events are streamed to
+    ``notify_queue`` as they are found, new listings through ``enrich_queue`` if given, and also returned.
+    """
+    logger.info(f"Scraping: {page_url}" + (f" (resuming at page {start_page})" if start_page > 1 else ""))
+
+    queue_size = get_config().pipeline.queue_size
+    source = source or PageSource(logger)
+    stats = stats or PipelineStats()
     new_listings = []
-    page_num = 1
-
-    async def create_browser_page():
-        """Helper to create new browser page with consistent user agent."""
-        return await browser.new_page(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
 
-    browser_page = await create_browser_page()
+    async def publish(event):
+        if event is not FLUSH:
+            new_listings.append(event)
+        if enrich_queue is not None and event is not FLUSH and event["type"] == "new":
+            await enrich_queue.put(event)
+        elif notify_queue is not None:
+            await notify_queue.put(event)
 
     session_factory = db_client.async_session_factory()
-    async with session_factory() as session:
-        try:
-            while True:
-                # Build URL with pagination
-                if page_num == 1:
-                    current_url = page_url
-                else:
-                    # Split URL into base and query string
-                    if "?" in page_url:
-                        base_url, query_string = page_url.split("?", 1)
-                        current_url = f"{base_url}{page_num}/?{query_string}"
-                    else:
-                        current_url = f"{page_url}{page_num}/"
-
-                logger.info(f"Navigating to page {page_num}: {current_url}")
-
-                await browser_page.goto(current_url, wait_until="domcontentloaded", timeout=30000)  # 30s max
-                await asyncio.sleep(2)
-
-                listings, has_more = await parse_page(browser_page, logger)
-                logger.info(f"Found {len(listings)} listings on page {page_num}")
-
-                if not listings:
-                    logger.info(f"No more listings on page {page_num}, stopping pagination")
-                    break
-
-                # Check each listing against database
-                for item_id, data in listings.items():
-                    try:
-                        existing = await db_client.get_listing_by_id(session, item_id)
-
-                        if existing:
-                            # Check for price change
-                            if existing.price != data["price"]:
-                                logger.info(f"Price change detected for {item_id}: {existing.price} -> {data['price']}")
-                                existing.last_price = existing.price
-                                existing.price = data["price"]
-                                existing.last_seen = datetime.now()
-                                existing.accessed_time = datetime.now()
-
-                                new_listings.append(
-                                    {
-                                        "item_id": item_id,
-                                        "url": data["url"],
-                                        "price": data["price"],
-                                        "old_price": existing.last_price,
-                                        "type": "price_change",
-                                        "listing_type": existing.listing_type.value,
-                                        "size_sqm": existing.size_sqm,
-                                    }
-                                )
-                            else:
-                                existing.last_seen = datetime.now()
-                                existing.accessed_time = datetime.now()
-                        else:
-                            # New listing
-                            logger.info(f"New listing found: {item_id}")
-                            now = datetime.now()
-
-                            new_listing = Listing(
-                                item_id=item_id,
-                                url=data["url"],
-                                listing_type=determine_listing_type(page_url),
-                                price=data["price"],
-                                last_price=None,
-                                size_sqm=data.get("size_sqm"),
-                                location=data.get("location"),
-                                first_seen=now,
-                                last_seen=now,
-                                accessed_time=now,
-                            )
-
-                            await db_client.insert_listing(session, new_listing)
-
-                            new_listings.append(
-                                {
-                                    "item_id": item_id,
-                                    "url": data["url"],
-                                    "price": data["price"],
-                                    "old_price": None,
-                                    "type": "new",
-                                    "listing_type": determine_listing_type(page_url),
-                                    "location": data.get("location"),
-                                    "size_sqm": data.get("size_sqm"),
-                                }
-                            )
-
-                        await session.commit()
-                    except Exception as e:
-                        await session.rollback()
-                        logger.error(f"Failed to save listing {item_id}: {e}", exc_info=True)
-                        continue
-
-                if not has_more:
-                    logger.info(f"No more pages available after page {page_num}, stopping pagination")
-                    break
-
-                if page_num >= config.app.max_pages_per_url:
-                    logger.warning(
-                        f"Available pages exceed configured maximum of: {config.app.max_pages_per_url}, stopping pagination"
-                    )
-                    break
-
-                # Close and reopen page before going to next page
-                logger.debug("Closing and reopening browser page for next page ...")
-                await browser_page.close()
-                browser_page = await create_browser_page()
+    async with session_factory() as session, BrowserSession(browser, source, logger) as browser_session:
+        parse_queue = stats.queue("parse", queue_size)
+        reconcile_queue = stats.queue("reconcile", queue_size)
+        stop = asyncio.Event()
 
-                page_num += 1
-                await asyncio.sleep(10)  # Longer delay between pages
+        try:
+            await run_stages(
+                fetch_stage(browser_session, source, page_url, start_page, parse_queue, stop, stats, logger),
+                parse_stage(browser_session, parse_queue, reconcile_queue, stop, stats, logger),
+                reconcile_stage(
+                    session,
+                    db_client,
+                    page_url,
+                    url_hash,
+                    url_index,
+                    reconcile_queue,
+                    publish,
+                    stats,
+                    logger,
+                    run_started,
+                ),
+            )
 
         except Exception as e:
             logger.error(f"Error during scrape_url: {e}", exc_info=True)
-            if config.discord.notify_on_error:
-                send_discord_error(str(e), logger.getChild("discord"), page_url)
+            # A replay failing (e.g. on a page missing from the archive) says nothing about the live site
+            if source.live:
+                await report_url_failure(db_client, page_url, str(e), logger)
 
-        finally:
-            await browser_page.close()
+        else:
+            if source.live:
+                await db_client.record_url_success(page_url)
 
     return new_listings
 
 
-async def crawl(db_client: DatabaseClient, logger: Logger):
+async def resolve_start_position(
+    urls: list[str], db_client: DatabaseClient, logger: Logger, resume: bool
+) -> tuple[int, int]:
+    """Return the (url_index, page_num) to start crawling from."""
+    if not resume:
+        return 0, 1
+
+    checkpoint = await db_client.get_checkpoint()
+
+    if checkpoint is None or checkpoint.completed:
+        logger.debug("No interrupted crawl to resume")
+        return 0, 1
+
+    if checkpoint.url_hash != get_url_hash(urls) or checkpoint.url_index >= len(urls):
+        logger.info("URL configuration changed since the interrupted crawl, starting from scratch")
+        return 0, 1
+
+    logger.info(
+        f"Resuming interrupted crawl from URL {checkpoint.url_index + 1}/{len(urls)}, page {checkpoint.page_num} "
+        f"(started {checkpoint.started_at:%Y-%m-%d %H:%M:%S})"
+    )
+    return checkpoint.url_index, checkpoint.page_num
+
+
+async def crawl(db_client: DatabaseClient, logger: Logger, resume: bool = False, source: PageSource | None = None):
     c_logger = logger.getChild("crawler")
     c_logger.info("Starting crawler ...")
 
@@ -244,28 +621,138 @@ async def crawl(db_client: DatabaseClient, logger: Logger):
     # Check for URL changes and handle flush
     await check_and_handle_url_changes(urls, db_client, c_logger)
 
-    async with async_playwright() as playwright:
+    owns_source = source is None
+    if owns_source:
+        source = create_page_source(get_config().source, c_logger)
+
+    url_hash = get_url_hash(urls)
+    start_index, start_page = await resolve_start_position(urls, db_client, c_logger, resume)
+
+    # Notifications stream out while the next pages are still being crawled. The queue holds
+    # a full Discord batch per queued page.
+    stats = PipelineStats()
+    notify_queue = stats.queue("notify", get_config().pipeline.queue_size * 10)
+    notifier = asyncio.create_task(notify_stage(notify_queue, stats, c_logger.getChild("discord"), live=source.live))
+
+    ended = False
+    try:
+        await crawl_urls(db_client, c_logger, urls, url_hash, start_index, start_page, source, notify_queue, stats)
+        await notify_queue.put(END)
+        ended = True
+        await asyncio.shield(notifier)
+    finally:
+        if not notifier.done():
+            # The run failed or was cancelled, e.g. by the scheduler timeout. Unless it already got every event,
+            # the notifier turns what it has left into a digest. asyncio.wait leaves it running even if this run
+            # is cancelled again meanwhile.
+            if not ended:
+                notifier.cancel()
+            _, pending = await asyncio.wait([notifier], timeout=DIGEST_TIMEOUT)
+            if pending:
+                c_logger.warning(f"Digest not sent within {DIGEST_TIMEOUT}s, finishing it in the background")
+
+        if owns_source:
+            source.close()
+
+        # Also for runs that failed or timed out, which are the ones the stage report has to explain
+        stats.report(c_logger)
+
+    c_logger.info("Crawler finished")
+
+
+async def crawl_urls(
+    db_client: DatabaseClient,
+    c_logger: Logger,
+    urls: list[str],
+    url_hash: str,
+    start_index: int,
+    start_page: int,
+    source: PageSource,
+    notify_queue: PipelineQueue,
+    stats: PipelineStats,
+):
+    """Scrape ``urls`` from the given start position, checkpointing after each one."""
+    session_factory = db_client.async_session_factory()
+    async with session_factory() as session, async_playwright() as playwright:
+        if start_index == 0 and start_page == 1:
+            await db_client.save_checkpoint(session, url_hash, 0, 1, urls[0], fresh=True)
+
+        # Listings seen since the run started, also before an interruption, are still online and not reposted
+        checkpoint = await db_client.get_checkpoint()
+        run_started = checkpoint.started_at if checkpoint else datetime.now()
+
         browser = await playwright.chromium.launch(headless=True)
 
+        enrich_queue = enricher = None
+        if get_config().enrichment.enabled:
+            # Unbounded, so waiting on detail pages never holds up reconciling
+            enrich_queue = stats.queue("enrich", 0)
+            enricher = asyncio.create_task(
+                enrich_stage(browser, source, db_client, enrich_queue, notify_queue, stats, run_started, c_logger)
+            )
+
         try:
-            for idx, page_url in enumerate(urls, 1):
-                c_logger.info(f"Processing URL {idx}/{len(urls)}")
+            for url_index in range(start_index, len(urls)):
+                page_url = urls[url_index]
+                c_logger.info(f"Processing URL {url_index + 1}/{len(urls)}")
+
+                circuit = await db_client.get_url_circuit(page_url)
+                if circuit and circuit.is_open(datetime.now()):
+                    c_logger.warning(
+                        f"Skipping {page_url}: circuit open until {circuit.opened_until:%Y-%m-%d %H:%M:%S} "
+                        f"after {circuit.failure_count} consecutive failures (last error: {circuit.last_error})"
+                    )
+                    new_listings = []
+                else:
+                    new_listings = await scrape_url(
+                        browser,
+                        page_url,
+                        db_client,
+                        c_logger,
+                        url_hash=url_hash,
+                        url_index=url_index,
+                        start_page=start_page if url_index == start_index else 1,
+                        source=source,
+                        notify_queue=notify_queue,
+                        stats=stats,
+                        enrich_queue=enrich_queue,
+                        run_started=run_started,
+                    )
 
-                new_listings = await scrape_url(browser, page_url, db_client, c_logger)
+                next_index = url_index + 1
+                await db_client.save_checkpoint(
+                    session,
+                    url_hash,
+                    next_index,
+                    1,
+                    urls[next_index] if next_index < len(urls) else None,
+                    completed=next_index == len(urls),
+                )
 
                 if new_listings:
-                    send_discord_notifications(new_listings, c_logger.getChild("discord"))
+                    c_logger.info(f"Found {len(new_listings)} new listings or changes")
                 else:
                     c_logger.info("No new listings or changes found")
 
                 # Small delay between URLs
-                await asyncio.sleep(5)
+                await source.settle(5)
+
+            if enricher is not None:
+                await enrich_queue.put(END)
+                await enricher
 
         except Exception as e:
             c_logger.error(f"Error during crawl: {e}", exc_info=True)
-            if config.discord.notify_on_error:
+            if source.live and get_config().discord.notify_on_error:
                 send_discord_error(str(e), c_logger.getChild("discord"), page_url)
         finally:
-            await browser.close()
+            if enricher is not None:
+                if not enricher.done():
+                    enricher.cancel()
+                    await asyncio.wait([enricher])
+                # Committed listings are notified even if their details never arrive
+                for event in enrich_queue.drain():
+                    if event is not END:
+                        await notify_queue.put(event)
 
-    c_logger.info("Crawler finished")
+            await browser.close()
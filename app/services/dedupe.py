@@ -0,0 +1,84 @@
+from datetime import datetime
+from logging import Logger
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_config
+from app.core.database import DatabaseClient
+from app.core.locations import fold_text
+from app.core.models import Listing
+
+
+def relative_difference(a: float, b: float) -> float:
+    if a == b:
+        return 0.0
+    return abs(a - b) / max(abs(a), abs(b))
+
+
+def title_similarity(a: str, b: str) -> float:
+    """Jaccard similarity (0-1) of the words of two titles, ignoring case, diacritics, punctuation and abbreviations.
+
+    Words rather than characters, so the location both titles start with does not make unrelated listings look alike.
+    """
+    words_a, words_b = set(fold_text(a).split()), set(fold_text(b).split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def is_near_duplicate(listing: Listing, candidate: Listing) -> bool:
+    """Same blocking cell is a given; compare size and price within the configured tolerances, and the titles."""
+    dedupe_config = get_config().dedupe
+
+    if not candidate.size_sqm or not listing.size_sqm:
+        return False
+
+    if (
+        relative_difference(listing.size_sqm, candidate.size_sqm) > dedupe_config.size_tolerance
+        or relative_difference(listing.price, candidate.price) > dedupe_config.price_tolerance
+    ):
+        return False
+
+    # Listings stored before titles were kept have none to compare
+    if dedupe_config.title_similarity and listing.title and candidate.title:
+        return title_similarity(listing.title, candidate.title) >= dedupe_config.title_similarity
+
+    return True
+
+
+async def find_original(
+    session: AsyncSession,
+    db_client: DatabaseClient,
+    listing: Listing,
+    logger: Logger,
+    run_started: datetime | None = None,
+) -> Listing | None:
+    """Return the listing that ``listing`` is most likely a repost of, comparing only its blocking cell.
+
+    Listings already seen since ``run_started`` are still online, so they are not considered reposted.
+    """
+    if listing.location_id is None or listing.size_bucket is None:
+        return None
+
+    candidates = await db_client.find_duplicate_candidates(
+        session, listing.listing_type, listing.location_id, listing.size_bucket, listing.item_id, run_started
+    )
+    matches = [candidate for candidate in candidates if is_near_duplicate(listing, candidate)]
+
+    logger.debug(f"Compared {listing.item_id} against {len(candidates)} candidates, {len(matches)} matched")
+
+    if not matches:
+        return None
+
+    # Prefer the closest price, then the oldest listing
+    best = min(
+        matches, key=lambda candidate: (relative_difference(listing.price, candidate.price), candidate.first_seen)
+    )
+
+    # Link reposts of reposts to the first listing of the chain
+    if best.duplicate_of:
+        original = await db_client.get_listing_by_id(session, best.duplicate_of)
+        if original is not None:
+            return original
+
+    return best
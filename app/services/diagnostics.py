@@ -0,0 +1,303 @@
+import asyncio
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime
+from logging import Logger
+from pathlib import Path
+from types import CodeType, FrameType
+
+from app.core.config import get_config
+
+# Frames from this directory are the crawler's own code
+APP_DIR = str(Path(__file__).resolve().parents[1])
+
+# Interval of the event loop heartbeat, in seconds
+HEARTBEAT_INTERVAL = 0.1
+
+# Set by SIGUSR1, consumed by the next crawl run
+_profile_requested = False
+
+
+def frame_label(code: CodeType) -> str:
+    return f"{code.co_qualname} ({Path(code.co_filename).name})"
+
+
+def thread_frames(frame: FrameType) -> list[FrameType]:
+    """The frames of a thread's stack, outermost first."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    return frames[::-1]
+
+
+def coroutine_chain(coro) -> tuple[list[FrameType], object]:
+    """Follow a task's coroutine through what each one awaits.
+
+    Returns the frames of the await chain, outermost first, and the innermost awaited object (usually a Future),
+    which is what the task is actually waiting on.
+    """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            return frames, coro
+
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames, None
+
+
+def format_frames(frames: list[FrameType]) -> str:
+    return "".join(traceback.StackSummary.extract((frame, frame.f_lineno) for frame in frames).format())
+
+
+class SamplingProfiler:
+    """Sample stacks every ``interval`` seconds from a background thread, without instrumenting any code.
+
+    Two views are collected. ``thread_stacks`` is what each thread is executing, which shows CPU time and blocking
+    calls (e.g. SQLite in the aiosqlite threads, requests in the to_thread pool). ``task_stacks`` is what each asyncio
+    task is waiting on, which shows where wall-clock time goes while the loop is idle (e.g. Playwright navigation).
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float):
+        self.loop = loop
+        self.interval = interval
+        self.thread_stacks: Counter[str] = Counter()
+        self.task_stacks: Counter[str] = Counter()
+        self.labels: dict[CodeType, str] = {}
+        self.samples = 0
+        self.sample_time = 0.0
+        self.started = 0.0
+        self.duration = 0.0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            start = time.perf_counter()
+            self.sample()
+            self.sample_time += time.perf_counter() - start
+
+    def fold(self, frames: list[FrameType]) -> str | None:
+        """Join the labels of ``frames`` into one folded stack, or None for the diagnostics' own threads and tasks."""
+        labels = []
+        for frame in frames:
+            code = frame.f_code
+            if code.co_filename == __file__:
+                return None
+
+            label = self.labels.get(code)
+            if label is None:
+                label = self.labels[code] = frame_label(code)
+            labels.append(label)
+
+        return ";".join(labels)
+
+    def sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_id and (stack := self.fold(thread_frames(frame))):
+                self.thread_stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+
+        for task in asyncio.all_tasks(self.loop):
+            frames, _ = coroutine_chain(task.get_coro())
+            if stack := self.fold(frames):
+                self.task_stacks[stack] += 1
+
+        self.samples += 1
+
+    def write(self, profile_dir: str | Path) -> list[Path]:
+        """Write both views as folded stacks, the input format of flamegraph.pl, speedscope and inferno."""
+        directory = Path(profile_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        prefix = f"profile-{datetime.now():%Y%m%d-%H%M%S}"
+
+        paths = []
+        for name, stacks in (("threads", self.thread_stacks), ("tasks", self.task_stacks)):
+            path = directory / f"{prefix}-{name}.folded"
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            paths.append(path)
+
+        return paths
+
+
+def request_profile(logger: Logger):
+    global _profile_requested
+    _profile_requested = True
+    logger.info("Profiling requested, the next crawl run will be profiled")
+
+
+@asynccontextmanager
+async def profile_run(logger: Logger):
+    """Profile the enclosed crawl run if ``diagnostics.profile`` is set or a profile was requested by signal."""
+    global _profile_requested
+
+    config = get_config().diagnostics
+    if not (config.profile or _profile_requested):
+        yield
+        return
+
+    _profile_requested = False
+    profiler = SamplingProfiler(asyncio.get_running_loop(), config.profile_interval_ms / 1000)
+    profiler.start()
+
+    try:
+        yield
+    finally:
+        profiler.stop()
+        paths = profiler.write(config.profile_dir)
+        overhead = profiler.sample_time / profiler.duration if profiler.duration else 0
+        logger.info(
+            f"Profiled {profiler.duration:.1f}s with {profiler.samples} samples "
+            f"({overhead:.1%} sampling overhead): {', '.join(map(str, paths))}"
+        )
+
+
+class TaskWatchdog:
+    """Dump the stack of tasks that wait on the same operation for longer than ``stuck_task_seconds``.
+
+    Only tasks running the crawler's own code are checked, and tasks waiting on other tasks (e.g. gather) are
+    skipped, because the tasks they wait on are checked themselves. Each hang is reported once.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        # Task -> (what it waits on, since when, reported)
+        self.waiting: dict[asyncio.Task, tuple[object, float, bool]] = {}
+
+    async def run(self):
+        while True:
+            threshold = get_config().diagnostics.stuck_task_seconds
+            await asyncio.sleep(max(1.0, threshold / 4))
+            if threshold > 0:
+                self.check(threshold)
+
+    def check(self, threshold: float):
+        now = time.monotonic()
+        waiting = {}
+
+        for task in asyncio.all_tasks():
+            if task is asyncio.current_task():
+                continue
+
+            frames, awaited = coroutine_chain(task.get_coro())
+            if awaited is None or isinstance(awaited, asyncio.Task) or type(awaited).__name__ == "_GatheringFuture":
+                continue
+            if not any(frame.f_code.co_filename.startswith(APP_DIR) for frame in frames):
+                continue
+
+            previous = self.waiting.get(task)
+            if previous is None or previous[0] is not awaited:
+                waiting[task] = (awaited, now, False)
+                continue
+
+            _, since, reported = previous
+            if not reported and now - since > threshold:
+                self.logger.warning(
+                    f"Task {task.get_name()} has been stuck for {now - since:.0f}s at:\n{format_frames(frames)}"
+                )
+                reported = True
+            waiting[task] = (awaited, since, reported)
+
+        # Holding on to the awaited objects keeps their identity from being reused by new ones
+        self.waiting = waiting
+
+
+class LoopMonitor:
+    """Track event loop lag with a heartbeat coroutine.
+
+    A watcher thread checks the heartbeat; when the loop misses it for longer than ``loop_lag_threshold_ms``,
+    it logs what the loop thread is executing at that moment, which is the blocking call.
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.watch, name="loop-monitor", daemon=True)
+
+    async def beat(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            self.heartbeat = time.monotonic()
+
+            lag = self.heartbeat - start - HEARTBEAT_INTERVAL
+            self.max_lag = max(self.max_lag, lag)
+
+            threshold = get_config().diagnostics.loop_lag_threshold_ms / 1000
+            if 0 < threshold < lag:
+                self.stalls += 1
+                self.logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    def watch(self):
+        reported = None
+
+        while not self.stopped.wait(HEARTBEAT_INTERVAL / 2):
+            threshold = get_config().diagnostics.loop_lag_threshold_ms / 1000
+            heartbeat = self.heartbeat
+            if threshold <= 0 or heartbeat == reported:
+                continue
+
+            if time.monotonic() - heartbeat - HEARTBEAT_INTERVAL > threshold:
+                reported = heartbeat
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is not None:
+                    self.logger.warning(
+                        f"Event loop blocked for more than {threshold * 1000:.0f} ms, it is executing:\n"
+                        f"{format_frames(thread_frames(frame))}"
+                    )
+
+
+class Diagnostics:
+    """Hang diagnostics for a long-running process: task watchdog, loop lag monitor and the profiling signal."""
+
+    def __init__(self, logger: Logger):
+        self.logger = logger.getChild("diagnostics")
+        self.watchdog = TaskWatchdog(self.logger)
+        self.monitor = LoopMonitor(self.logger)
+        self.tasks: list[asyncio.Task] = []
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self.watchdog.run()), asyncio.create_task(self.monitor.beat())]
+        self.monitor.thread.start()
+
+        if hasattr(signal, "SIGUSR1"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, request_profile, self.logger)
+
+    async def stop(self):
+        if hasattr(signal, "SIGUSR1"):
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGUSR1)
+
+        self.monitor.stopped.set()
+        for task in self.tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+        self.logger.info(
+            f"Event loop lag: max {self.monitor.max_lag * 1000:.0f} ms, "
+            f"{self.monitor.stalls} stalls over {get_config().diagnostics.loop_lag_threshold_ms} ms"
+        )
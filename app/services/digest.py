@@ -0,0 +1,177 @@
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from logging import Logger
+from pathlib import Path
+
+from app.core.config import NotificationConfig, PriorityFilter
+from app.core.locations import normalize_location
+from app.services.export import CsvExportWriter
+
+# Column name -> value kind of exported digest events
+EVENT_COLUMNS = {
+    "type": "string",
+    "item_id": "string",
+    "url": "string",
+    "source_url": "string",
+    "listing_type": "string",
+    "location": "string",
+    "price": "float",
+    "old_price": "float",
+    "size_sqm": "float",
+    "duplicate_of": "string",
+}
+
+# Send times of individual alerts, shared by all runs of this process
+_recent_alerts: deque[datetime] = deque()
+
+
+def event_kind(event: dict) -> str:
+    if event["type"] == "new" and event.get("duplicate_of"):
+        return "repost"
+    return event["type"]
+
+
+def price_drop_percent(event: dict) -> float | None:
+    if event["type"] != "price_change" or not event.get("old_price"):
+        return None
+    return (event["old_price"] - event["price"]) / event["old_price"] * 100
+
+
+def matches_filter(event: dict, priority_filter: PriorityFilter) -> bool:
+    if priority_filter.type and event_kind(event) != priority_filter.type:
+        return False
+
+    if priority_filter.listing_type and event.get("listing_type") != priority_filter.listing_type:
+        return False
+
+    if priority_filter.location:
+        location_key = normalize_location(event.get("location")) or ""
+        if normalize_location(priority_filter.location) not in location_key:
+            return False
+
+    if priority_filter.max_price is not None and event["price"] > priority_filter.max_price:
+        return False
+
+    size = event.get("size_sqm")
+    if priority_filter.min_size_sqm is not None and (not size or size < priority_filter.min_size_sqm):
+        return False
+
+    if priority_filter.max_price_per_sqm is not None:
+        if not size or event["price"] / size > priority_filter.max_price_per_sqm:
+            return False
+
+    if priority_filter.min_drop_percent is not None:
+        drop = price_drop_percent(event)
+        if drop is None or drop < priority_filter.min_drop_percent:
+            return False
+
+    return True
+
+
+def is_priority(event: dict, filters: list[PriorityFilter]) -> bool:
+    return any(matches_filter(event, priority_filter) for priority_filter in filters)
+
+
+class StormGuard:
+    """Decide per event of a run whether it is sent as an individual alert or held for the digest.
+
+    Once a run produces more than ``storm_per_run`` events, or the process sent ``storm_per_window``
+    alerts within ``storm_window_minutes``, every further event is held, unless it matches a
+    priority filter.
+    """
+
+    def __init__(self, config: NotificationConfig, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.window = timedelta(minutes=config.storm_window_minutes)
+        self.run_events = 0
+        self.storm_reason: str | None = None
+        self.held: list[dict] = []
+
+    def admit(self, event: dict) -> bool:
+        """Return True if ``event`` should be sent now, otherwise keep it for the digest."""
+        now = datetime.now()
+        while _recent_alerts and now - _recent_alerts[0] > self.window:
+            _recent_alerts.popleft()
+
+        self.run_events += 1
+
+        if self.storm_reason is None:
+            if self.run_events > self.config.storm_per_run:
+                self.storm_reason = f"more than {self.config.storm_per_run} updates in this run"
+            elif len(_recent_alerts) >= self.config.storm_per_window:
+                self.storm_reason = (
+                    f"{len(_recent_alerts)} alerts in the last {self.config.storm_window_minutes} minutes"
+                )
+
+            if self.storm_reason is not None:
+                self.logger.warning(f"Notification storm ({self.storm_reason}), collapsing updates into a digest")
+
+        if self.storm_reason is not None and not is_priority(event, self.config.priority):
+            self.held.append(event)
+            return False
+
+        _recent_alerts.append(now)
+        return True
+
+
+def write_digest_file(events: list[dict], digest_dir: str | Path) -> Path:
+    path = Path(digest_dir) / f"digest-{datetime.now():%Y%m%d-%H%M%S}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = CsvExportWriter(f, EVENT_COLUMNS)
+        for event in events:
+            writer.write({name: event.get(name) for name in EVENT_COLUMNS})
+        writer.close()
+
+    return path
+
+
+def top_price_drops(events: list[dict], limit: int) -> list[tuple[dict, float]]:
+    drops = [(event, drop) for event in events if (drop := price_drop_percent(event)) is not None and drop > 0]
+    return sorted(drops, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def format_counts(counts: Counter, limit: int = 10) -> str:
+    lines = [f"**{count}** × {name}" for name, count in counts.most_common(limit)]
+    if len(counts) > limit:
+        lines.append(f"… and {len(counts) - limit} more")
+    return "\n".join(lines)
+
+
+def build_digest_embed(events: list[dict], sent: int, reason: str, top_drops: int, filename: str) -> dict:
+    """Summarize held events: counts per search URL and location, and the biggest price drops."""
+    kinds = Counter(event_kind(event) for event in events)
+    summary = ", ".join(f"{count} {kind.replace('_', ' ')}" for kind, count in kinds.most_common())
+
+    fields = [
+        {
+            "name": "🔗 By search",
+            "value": format_counts(Counter(event.get("source_url") or "unknown" for event in events))[:1024],
+            "inline": False,
+        },
+        {
+            "name": "📍 By location",
+            "value": format_counts(Counter(event.get("location") or "unknown" for event in events))[:1024],
+            "inline": False,
+        },
+    ]
+
+    drops = top_price_drops(events, top_drops)
+    if drops:
+        value = "\n".join(
+            f"[{event['item_id']}]({event['url']}) €{event['old_price']:,.0f} → €{event['price']:,.0f} (-{drop:.1f}%)"
+            for event, drop in drops
+        )
+        fields.append({"name": "📉 Biggest price drops", "value": value[:1024], "inline": False})
+
+    fields.append({"name": "📎 All updates", "value": f"`{filename}` (attached)", "inline": False})
+
+    return {
+        "title": f"📬 Digest - {len(events)} updates",
+        "description": f"{summary}\n\nCollapsed because of {reason}. {sent} alerts were sent individually.",
+        "color": 3447003,
+        "fields": fields,
+        "footer": {"text": "nepremicninko"},
+    }
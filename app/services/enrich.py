@@ -0,0 +1,140 @@
+import asyncio
+import re
+import time
+from datetime import timedelta
+from logging import Logger
+
+from playwright.async_api import BrowserContext, Page
+
+from app.core.config import get_config
+from app.core.database import DatabaseClient
+from app.services.source import PageSource
+
+DETAIL_FIELDS = ("rooms", "floor", "year_built", "energy_class")
+
+ROOMS_PATTERN = re.compile(r"\b(\d(?:[.,]5)?)\s*-\s*sobn", re.IGNORECASE)
+STUDIO_PATTERN = re.compile(r"\bgarsonjer", re.IGNORECASE)
+FLOOR_PATTERN = re.compile(r"Nadstropje\s*:?\s*([^\n,;]{1,20})", re.IGNORECASE)
+YEAR_BUILT_PATTERN = re.compile(r"(?:Leto izgradnje|zgrajen[oa]?(?:\s+l(?:eta|\.))?)\s*:?\s*(\d{4})", re.IGNORECASE)
+ENERGY_CLASS_PATTERN = re.compile(r"Energijski razred\s*:?\s*([A-G][12+]?)\b")
+
+
+class RateLimiter:
+    """Space out request starts across all workers to at most ``requests_per_minute``."""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60 / requests_per_minute if requests_per_minute > 0 else 0
+        self.lock = asyncio.Lock()
+        self.next_slot = 0.0
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def detail_rate_limiter(source: PageSource) -> RateLimiter:
+    """The limiter shared by all detail page fetches of a crawl, so the limit holds across pages and URLs."""
+    # A replay does not hit the site, so there is nothing to rate limit
+    return RateLimiter(get_config().enrichment.requests_per_minute if source.live else 0)
+
+
+def parse_detail_text(text: str) -> dict:
+    """Extract room count, floor, year built and energy class from the text of a detail page."""
+    details = {}
+
+    if rooms_match := ROOMS_PATTERN.search(text):
+        details["rooms"] = float(rooms_match.group(1).replace(",", "."))
+    elif STUDIO_PATTERN.search(text):
+        details["rooms"] = 1.0
+
+    if floor_match := FLOOR_PATTERN.search(text):
+        details["floor"] = floor_match.group(1).strip()
+
+    if year_match := YEAR_BUILT_PATTERN.search(text):
+        details["year_built"] = int(year_match.group(1))
+
+    if energy_match := ENERGY_CLASS_PATTERN.search(text):
+        details["energy_class"] = energy_match.group(1)
+
+    return details
+
+
+async def parse_detail_page(browser_page: Page, logger: Logger) -> dict:
+    logger.debug(f"Parsing detail page: {browser_page.url}")
+
+    text = await browser_page.locator("body").inner_text(timeout=10000)
+    details = parse_detail_text(text)
+
+    logger.debug(f"Extracted details: {details}")
+    return details
+
+
+async def fetch_details(
+    context: BrowserContext,
+    source: PageSource,
+    listings: dict[str, str],
+    rate_limiter: RateLimiter,
+    logger: Logger,
+) -> dict[str, dict]:
+    """Fetch detail pages for ``listings`` ({item_id: url}) with a bounded, rate-limited worker pool."""
+    enrichment_config = get_config().enrichment
+
+    queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+    for item in listings.items():
+        queue.put_nowait(item)
+
+    details = {}
+
+    async def worker(worker_id: int):
+        browser_page = await context.new_page()
+        await source.attach(browser_page)
+        try:
+            while True:
+                try:
+                    item_id, url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                await rate_limiter.wait()
+                try:
+                    await source.goto(browser_page, url)
+                    details[item_id] = await parse_detail_page(browser_page, logger)
+                except Exception as e:
+                    logger.warning(f"Worker {worker_id} failed to fetch details for {item_id}: {e}")
+        finally:
+            await browser_page.close()
+
+    workers = min(enrichment_config.concurrency, len(listings))
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(workers)))
+
+    return details
+
+
+async def enrich_listings(
+    context: BrowserContext,
+    source: PageSource,
+    listings: dict[str, str],
+    db_client: DatabaseClient,
+    rate_limiter: RateLimiter,
+    logger: Logger,
+) -> dict[str, dict]:
+    """Return detail data for new ``listings`` ({item_id: url}), fetching only what is not cached yet."""
+    e_logger = logger.getChild("enrich")
+    ttl = timedelta(hours=get_config().enrichment.cache_ttl_hours)
+
+    details = await db_client.get_cached_details(list(listings), ttl)
+    missing = {item_id: url for item_id, url in listings.items() if item_id not in details}
+
+    e_logger.info(f"Enriching {len(listings)} listings ({len(details)} cached, {len(missing)} to fetch)")
+
+    if missing:
+        fetched = await fetch_details(context, source, missing, rate_limiter, e_logger)
+        await db_client.cache_details(fetched)
+        details.update(fetched)
+
+    return details
@@ -1,26 +1,114 @@
-import time
+import asyncio
+import json
 from logging import Logger
+from pathlib import Path
 
 import requests
 
-from app.core.config import config
+from app.core.config import get_config
+from app.services.digest import StormGuard, build_digest_embed, write_digest_file
+from app.services.pipeline import END, FLUSH, PipelineQueue, PipelineStats
 
+# Below this many listings, a location's median is too noisy to compare against
+MIN_LOCAL_LISTINGS = 5
 
-def send_discord_notifications(listings, logger: Logger):
-    if not config.discord.webhook_url:
-        logger.warning("Discord webhook URL not configured, skipping notifications")
-        return
+# Per webhook request, in seconds; a hanging Discord request must not hold up a run past its scheduler timeout
+DISCORD_TIMEOUT = 10
 
-    logger.info(f"Sending {len(listings)} notifications to Discord")
 
+async def notify_stage(queue: PipelineQueue, stats: PipelineStats, logger: Logger, live: bool = True):
+    """Pipeline stage that streams change events to Discord in batches of up to 10 embeds.
+
+    A batch is sent when it is full or when an upstream stage flushes it at the end of a page. During a
+    notification storm (see ``StormGuard``), events that match no priority filter are held back and
+    summarized in a single digest when the run ends.
+
+    When the stage is cancelled, e.g. because the run timed out, the events that were not sent yet are added
+    to the digest, which is written and sent before the cancellation is re-raised.
+    """
+    notification_config = get_config().notifications
+    storm_guard = StormGuard(notification_config, logger)
     batch_size = 10
-    for i in range(0, len(listings), batch_size):
-        batch = listings[i : i + batch_size]
-        send_discord_batch(batch, logger)
+    batch = []
+    sent = 0
+
+    async def deliver(send, *args, description: str):
+        if not live:
+            logger.info(f"Replaying, skipping {description}")
+            return
+
+        if not get_config().discord.webhook_url:
+            logger.warning(f"Discord webhook URL not configured, skipping {description}")
+            return
+
+        try:
+            # requests is blocking, keep it off the event loop
+            await asyncio.to_thread(send, *args, logger)
+        except Exception as e:
+            logger.exception(f"Exception occurred while sending {description} to Discord: {e}")
+
+        # Small delay between messages to avoid rate limits
+        await asyncio.sleep(1)
+
+    async def flush():
+        nonlocal batch
+        if not batch:
+            return
+
+        # Taken off before sending, so a cancelled send is not repeated in the digest
+        events, batch = batch, []
+        async with stats.busy("notify"):
+            await deliver(send_discord_batch, events, description=f"{len(events)} notifications")
+
+    async def send_digest(reason: str | None):
+        if not storm_guard.held:
+            return
+
+        async with stats.busy("notify"):
+            path = write_digest_file(storm_guard.held, notification_config.digest_dir)
+            logger.info(f"Exported {len(storm_guard.held)} held updates to {path}")
+
+            embed = build_digest_embed(storm_guard.held, sent, reason, notification_config.digest_top_drops, path.name)
+            await deliver(send_discord_digest, embed, path, description="digest")
+
+    try:
+        while (item := await queue.get()) is not END:
+            if item is FLUSH:
+                await flush()
+                continue
+
+            if storm_guard.admit(item):
+                batch.append(item)
+                sent += 1
+                if len(batch) >= batch_size:
+                    await flush()
+
+        await flush()
+    except asyncio.CancelledError:
+        sent -= len(batch)
+        unsent = batch + [item for item in queue.drain() if item is not FLUSH and item is not END]
+        storm_guard.held.extend(unsent)
+        logger.warning(f"Run cancelled, adding {len(unsent)} unsent updates to the digest")
+
+        await send_digest(storm_guard.storm_reason or "the run being cancelled")
+        raise
+
+    await send_digest(storm_guard.storm_reason)
+
+
+def compare_to_local_median(listing_data: dict) -> str | None:
+    """Describe the listing's price per m² relative to the median of its location and type."""
+    median = listing_data.get("local_median_price_per_sqm")
+    size_sqm = listing_data.get("size_sqm")
+    if not median or not size_sqm or listing_data.get("local_listing_count", 0) < MIN_LOCAL_LISTINGS:
+        return None
+
+    difference = (listing_data["price"] / size_sqm - median) / median * 100
+    median_text = f"median €{median:,.2f}/m² of {listing_data['local_listing_count']} listings"
 
-        # Small delay between batches to avoid rate limits
-        if i + batch_size < len(listings):
-            time.sleep(1)
+    if abs(difference) < 1:
+        return f"At the local median ({median_text})"
+    return f"{abs(difference):.0f}% {'below' if difference < 0 else 'above'} local median ({median_text})"
 
 
 def send_discord_batch(listings, logger: Logger):
@@ -34,6 +122,11 @@ def send_discord_batch(listings, logger: Logger):
             title = f"💰 Price Change - {listing_data['item_id']}"
 
             price_field_value = f"~~€{listing_data['old_price']:,.2f}~~ → **€{listing_data['price']:,.2f}**"
+        elif listing_data.get("duplicate_of"):
+            color = 9807270
+            title = f"♻️ Reposted Listing - {listing_data['item_id']}"
+
+            price_field_value = f"€{listing_data['price']:,.2f}"
         else:
             color = 5763719
             title = f"🏡 New Listing - {listing_data['item_id']}"
@@ -58,6 +151,28 @@ def send_discord_batch(listings, logger: Logger):
         if listing_data.get("location"):
             fields.append({"name": "📍 Location", "value": listing_data["location"], "inline": True})
 
+        if comparison := compare_to_local_median(listing_data):
+            fields.append({"name": "📊 Local price/m²", "value": comparison, "inline": False})
+
+        if listing_data.get("duplicate_of"):
+            original_value = (
+                f"[{listing_data['duplicate_of']}]({listing_data['original_url']}) "
+                f"at €{listing_data['original_price']:,.2f}"
+            )
+            fields.append({"name": "🔁 Repost of", "value": original_value, "inline": False})
+
+        if listing_data.get("rooms"):
+            fields.append({"name": "🛏️ Rooms", "value": f"{listing_data['rooms']:g}", "inline": True})
+
+        if listing_data.get("floor"):
+            fields.append({"name": "🏢 Floor", "value": listing_data["floor"], "inline": True})
+
+        if listing_data.get("year_built"):
+            fields.append({"name": "🏗️ Built", "value": str(listing_data["year_built"]), "inline": True})
+
+        if listing_data.get("energy_class"):
+            fields.append({"name": "⚡ Energy class", "value": listing_data["energy_class"], "inline": True})
+
         embeds.append(
             {
                 "title": title,
@@ -72,7 +187,9 @@ def send_discord_batch(listings, logger: Logger):
     headers = {"Content-Type": "application/json"}
 
     try:
-        response = requests.post(config.discord.webhook_url, json=payload, headers=headers)
+        response = requests.post(
+            get_config().discord.webhook_url, json=payload, headers=headers, timeout=DISCORD_TIMEOUT
+        )
 
         if response.status_code not in (200, 204):
             logger.warning(f"Failed to send batch to Discord: {response.status_code} - {response.text}")
@@ -83,6 +200,28 @@ def send_discord_batch(listings, logger: Logger):
         logger.exception(f"Exception occurred while sending batch to Discord: {e}")
 
 
+def send_discord_digest(embed: dict, attachment: Path, logger: Logger):
+    """Send a digest embed with the exported events attached as a file."""
+    payload = {"embeds": [embed]}
+
+    try:
+        with open(attachment, "rb") as f:
+            response = requests.post(
+                get_config().discord.webhook_url,
+                data={"payload_json": json.dumps(payload)},
+                files={"files[0]": (attachment.name, f, "text/csv")},
+                timeout=DISCORD_TIMEOUT,
+            )
+
+        if response.status_code not in (200, 204):
+            logger.warning(f"Failed to send digest to Discord: {response.status_code} - {response.text}")
+        else:
+            logger.info("Discord digest sent successfully")
+
+    except Exception as e:
+        logger.exception(f"Exception occurred while sending digest to Discord: {e}")
+
+
 def send_discord_error(error_message: str, logger: Logger, page_url: str = None):
     description = f"```\n{error_message}\n```"
 
@@ -104,7 +243,9 @@ def send_discord_error(error_message: str, logger: Logger, page_url: str = None)
     headers = {"Content-Type": "application/json"}
 
     try:
-        response = requests.post(config.discord.webhook_url, json=payload, headers=headers)
+        response = requests.post(
+            get_config().discord.webhook_url, json=payload, headers=headers, timeout=DISCORD_TIMEOUT
+        )
 
         if response.status_code not in (200, 204):
             logger.warning(f"Failed to send error embed to Discord: {response.status_code} - {response.text}")
@@ -3,18 +3,32 @@ from logging import Logger
 
 from playwright.async_api import Locator, Page
 
+NEXT_PAGE_XPATH = """xpath=//*[@id='pagination']/ul/li[contains(@class, 'paging_next')]"""
 
-async def parse_page(browser_page: Page, logger: Logger) -> tuple[dict, bool]:
-    logger.debug(f"Parsing page: {browser_page.url}")
 
-    # Try to reject cookies if the button exists
+async def dismiss_cookie_banner(browser_page: Page, logger: Logger) -> bool:
+    """Reject cookies if the banner is shown, returning whether it was dismissed."""
     try:
         cookie_button = browser_page.get_by_role("button", name="Zavrni")
         if await cookie_button.count() > 0:
             await cookie_button.click()
             logger.debug("Rejected cookies")
+            return True
     except Exception as e:
         logger.debug(f"No cookie banner or already dismissed: {e}")
+    return False
+
+
+async def has_next_page(browser_page: Page) -> bool:
+    return await browser_page.locator(NEXT_PAGE_XPATH).count() > 0
+
+
+async def parse_page(browser_page: Page, logger: Logger, dismiss_cookies: bool = True) -> tuple[dict, bool]:
+    logger.debug(f"Parsing page: {browser_page.url}")
+
+    # Skipped when the browser context already handled the consent, or the page is an offline copy
+    if dismiss_cookies:
+        await dismiss_cookie_banner(browser_page, logger)
 
     # Wait for the page to load
     await browser_page.wait_for_load_state("domcontentloaded")
@@ -40,8 +54,7 @@ async def parse_page(browser_page: Page, logger: Logger) -> tuple[dict, bool]:
             continue  # skip to next listing instead of crashing
 
     # Check if there's a next page button
-    next_page_xpath = """xpath=//*[@id='pagination']/ul/li[contains(@class, 'paging_next')]"""
-    more_pages = await browser_page.locator(next_page_xpath).count() > 0
+    more_pages = await has_next_page(browser_page)
 
     logger.info(f"Parsing finished. Extracted {len(extracted_data)} listings. More pages: {more_pages}")
 
@@ -66,7 +79,7 @@ async def parse_result(item: Locator, idx: int, logger: Logger) -> tuple[str, di
             location = title.split(",")[0].strip() if "," in title else title.strip()
         except Exception as e:
             logger.warning(f"  Could not get title: {e}")
-            title = "Unknown"
+            title = None
             location = None
 
         # Extract price
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections.abc import Coroutine
+from contextlib import asynccontextmanager
+from logging import Logger
+
+# Marks the end of a stage's output
+END = object()
+
+# Asks the notify stage to send what it has batched so far
+FLUSH = object()
+
+
+class QueueStats:
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.puts = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+
+    def __str__(self) -> str:
+        avg_depth = self.depth_total / self.puts if self.puts else 0
+        return (
+            f"{self.name}: {self.puts} items, depth avg {avg_depth:.1f} max {self.max_depth}/{self.maxsize or 'unbounded'}, "
+            f"{self.stalls} backpressure stalls ({self.stall_time:.1f}s blocked)"
+        )
+
+
+class PipelineQueue:
+    """A bounded queue between two stages that records its depth and how often producers had to wait."""
+
+    def __init__(self, stats: QueueStats):
+        self.queue = asyncio.Queue(stats.maxsize)
+        self.stats = stats
+
+    async def put(self, item):
+        if self.queue.full():
+            self.stats.stalls += 1
+            start = time.perf_counter()
+            await self.queue.put(item)
+            self.stats.stall_time += time.perf_counter() - start
+        else:
+            self.queue.put_nowait(item)
+
+        depth = self.queue.qsize()
+        self.stats.puts += 1
+        self.stats.depth_total += depth
+        self.stats.max_depth = max(self.stats.max_depth, depth)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def drain(self, limit: int | None = None) -> list:
+        """Remove and return what is queued right now, up to ``limit`` items, without waiting."""
+        items = []
+        while not self.queue.empty() and (limit is None or len(items) < limit):
+            items.append(self.queue.get_nowait())
+        return items
+
+
+class PipelineStats:
+    """Queue depth, stage utilization and backpressure for one crawl run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queues: dict[str, QueueStats] = {}
+        self.busy_time: dict[str, float] = {}
+        self.items: dict[str, int] = {}
+
+    def queue(self, name: str, maxsize: int) -> PipelineQueue:
+        """Create a queue; queues with the same name (e.g. one per URL) share their statistics."""
+        if name not in self.queues:
+            self.queues[name] = QueueStats(name, maxsize)
+        return PipelineQueue(self.queues[name])
+
+    @asynccontextmanager
+    async def busy(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy_time[stage] = self.busy_time.get(stage, 0.0) + time.perf_counter() - start
+            self.items[stage] = self.items.get(stage, 0) + 1
+
+    def report(self, logger: Logger):
+        wall_time = time.perf_counter() - self.started
+
+        utilization = ", ".join(
+            f"{stage} {busy / wall_time:.0%} ({self.items[stage]} items, {busy:.1f}s)"
+            for stage, busy in self.busy_time.items()
+        )
+        logger.info(f"Pipeline finished in {wall_time:.1f}s, stage utilization: {utilization or 'idle'}")
+
+        for queue_stats in self.queues.values():
+            logger.info(f"Pipeline queue {queue_stats}")
+
+
+async def run_stages(*stages: Coroutine):
+    """Run pipeline stages concurrently, given in order from the first stage to the last.
+
+    If a stage fails, the stages before it are cancelled, while the stages after it finish what was already
+    queued for them (a failing stage still ends its output with END). The first error is then re-raised.
+    """
+    tasks = [asyncio.create_task(stage) for stage in stages]
+    errors = []
+    pending = set(tasks)
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+
+            for index, task in enumerate(tasks):
+                if task in done and not task.cancelled() and task.exception() is not None:
+                    errors.append(task.exception())
+                    for upstream in tasks[:index]:
+                        upstream.cancel()
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    if errors:
+        raise errors[0]
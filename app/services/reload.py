@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+from contextlib import suppress
+from logging import Logger
+
+import pytz
+from apscheduler.schedulers.base import BaseScheduler
+
+from app.core.config import Config, SchedulerConfig, get_config, get_config_path, set_config
+from app.core.database import DatabaseClient
+from app.services.crawler import get_url_hash
+from app.services.notify import send_discord_error
+
+# Read once at startup, so changes to them are kept back until a restart
+RESTART_SECTIONS = ("database", "api")
+
+
+def changed_sections(old: Config, new: Config) -> list[str]:
+    return [name for name in Config.model_fields if getattr(old, name) != getattr(new, name)]
+
+
+def validate_reload(config: Config):
+    """Checks beyond the config model that a running process depends on."""
+    if not config.urls:
+        raise ValueError("No URLs configured")
+    pytz.timezone(config.scheduler.timezone)
+
+
+class ConfigWatcher:
+    """Poll the config file and swap in the new configuration when it changes.
+
+    A change is only applied once the file read the same on two polls in a row, so a half-written file
+    is never loaded, and once it validates. An invalid file is reported and the running configuration kept.
+
+    The swap replaces the whole configuration at once. A crawl that is running finishes its URL list,
+    while settings it reads as it goes (e.g. Discord) take effect immediately.
+    """
+
+    def __init__(self, scheduler: BaseScheduler, job_id: str, logger: Logger):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.logger = logger.getChild("reload")
+        self.path = get_config_path()
+        self.applied = self.digest()
+        self.pending: str | None = None
+        self.rejected: str | None = None
+        self.task: asyncio.Task | None = None
+
+    def digest(self) -> str | None:
+        try:
+            return hashlib.md5(self.path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+        self.logger.info(f"Watching {self.path} for changes")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self.task
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(get_config().scheduler.reload_interval_seconds)
+            try:
+                await self.poll()
+            except Exception as e:
+                self.logger.error(f"Failed to apply changes to {self.path}: {e}", exc_info=True)
+
+    async def poll(self):
+        digest = self.digest()
+
+        if digest is None or digest in (self.applied, self.rejected):
+            self.pending = None
+            return
+
+        if digest != self.pending:
+            # Wait for the next poll in case the file is still being written
+            self.pending = digest
+            return
+
+        self.pending = None
+
+        try:
+            config = Config.from_yaml(self.path)
+            validate_reload(config)
+        except Exception as e:
+            self.rejected = digest
+            error_msg = f"Invalid configuration in {self.path}, keeping the running one: {e}"
+            self.logger.error(error_msg)
+            if get_config().discord.notify_on_error:
+                send_discord_error(error_msg, self.logger.getChild("discord"), "Config Reload Error")
+            return
+
+        self.applied = digest
+        await self.apply(config)
+
+    async def apply(self, config: Config):
+        old_config = get_config()
+
+        kept = [name for name in RESTART_SECTIONS if getattr(old_config, name) != getattr(config, name)]
+        if kept:
+            self.logger.warning(f"Changes to {', '.join(kept)} take effect after a restart")
+            config = config.model_copy(update={name: getattr(old_config, name) for name in kept})
+
+        changed = changed_sections(old_config, config)
+        set_config(config)
+
+        if not changed:
+            self.logger.info(f"Reloaded {self.path}, no settings changed")
+            return
+
+        self.logger.info(f"Reloaded {self.path}, changed: {', '.join(changed)}")
+
+        if "scheduler" in changed:
+            self.reschedule(old_config.scheduler, config.scheduler)
+        if "urls" in changed:
+            await self.apply_urls(old_config.urls, config.urls)
+
+    def reschedule(self, old: SchedulerConfig, new: SchedulerConfig):
+        job = self.scheduler.get_job(self.job_id)
+        if job is None:
+            return
+
+        if (new.interval_minutes, new.timezone) != (old.interval_minutes, old.timezone):
+            # Only the next run times change, a running job is left alone
+            job = self.scheduler.reschedule_job(
+                self.job_id, trigger="interval", minutes=new.interval_minutes, timezone=pytz.timezone(new.timezone)
+            )
+            if new.enabled and job.next_run_time:
+                self.logger.info(
+                    f"Rescheduled every {new.interval_minutes} minutes, "
+                    f"next run at: {job.next_run_time.strftime('%Y-%m-%d %H:%M:%S %Z')}"
+                )
+
+        if not new.enabled:
+            # Also when it was paused before: rescheduling gives the job a next run time, which would restart it
+            job.pause()
+            if old.enabled:
+                self.logger.info("Scheduler disabled, scheduled scrapes paused")
+        elif not old.enabled:
+            job.resume()
+            self.logger.info("Scheduler enabled, scheduled scrapes resumed")
+
+    async def apply_urls(self, old_urls: list[str], new_urls: list[str]):
+        added = [url for url in new_urls if url not in old_urls]
+        removed = [url for url in old_urls if url not in new_urls]
+        self.logger.info(f"URLs changed: {len(added)} added, {len(removed)} removed, used from the next crawl on")
+
+        db_client = DatabaseClient(url=get_config().database.url, logger=self.logger)
+        try:
+            # The next crawl would otherwise see a different URL list and flush every listing
+            await db_client.set_url_hash(get_url_hash(new_urls))
+            await db_client.delete_url_circuits(removed)
+        finally:
+            await db_client.cleanup()
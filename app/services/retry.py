@@ -0,0 +1,50 @@
+import asyncio
+import random
+from logging import Logger
+from typing import Awaitable, Callable, TypeVar
+
+from playwright.async_api import Error as PlaywrightError
+
+T = TypeVar("T")
+
+# Navigation timeouts (playwright TimeoutError subclasses Error), network errors and dropped connections
+TRANSIENT_ERRORS = (PlaywrightError, asyncio.TimeoutError, ConnectionError)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter: a random delay in [0, min(max_delay, base_delay * 2^attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+async def retry_with_backoff(
+    operation: Callable[[], Awaitable[T]],
+    logger: Logger,
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    description: str = "operation",
+    on_retry: Callable[[], Awaitable[None]] | None = None,
+) -> T:
+    """Run ``operation`` and retry transient failures up to ``attempts`` times in total.
+
+    ``on_retry`` runs before each new attempt, e.g. to replace a browser page left in a bad state.
+    Non-transient errors and the last transient error are re-raised.
+    """
+    for attempt in range(attempts):
+        try:
+            return await operation()
+        except TRANSIENT_ERRORS as e:
+            if attempt + 1 >= attempts:
+                logger.error(f"{description} failed after {attempts} attempts: {e}")
+                raise
+
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(
+                f"{description} failed (attempt {attempt + 1}/{attempts}): {e}. Retrying in {delay:.1f}s ..."
+            )
+            await asyncio.sleep(delay)
+
+            if on_retry is not None:
+                await on_retry()
+
+    raise ValueError("attempts must be at least 1")
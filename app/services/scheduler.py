@@ -6,10 +6,18 @@ import pytz
 from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MAX_INSTANCES, JobExecutionEvent
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from app.core.config import config
+from app.core.config import get_config
 from app.core.database import DatabaseClient
-from app.services.crawler import crawl
+from app.services.crawler import DIGEST_TIMEOUT, crawl
+from app.services.diagnostics import profile_run
 from app.services.notify import send_discord_error
+from app.services.reload import ConfigWatcher
+
+SCRAPE_JOB_ID = "scrape"
+
+# Seconds between a scrape's timeout and the next interval, for a cancelled run to send its digest, clean up and
+# report the timeout. A run still going at the next tick makes max_instances skip that tick.
+TIMEOUT_BUFFER = DIGEST_TIMEOUT + 15
 
 
 async def run_scrape_job(logger: Logger, retry_count: int = 0):
@@ -22,8 +30,12 @@ async def run_scrape_job(logger: Logger, retry_count: int = 0):
 
     try:
         # Fresh connection for each scrape
-        db_client = DatabaseClient(url=f"sqlite+aiosqlite:///{config.database.path}", logger=logger)
-        await crawl(db_client, logger)
+        db_client = DatabaseClient(url=get_config().database.url, logger=logger)
+
+        # Retries always pick up where the failed attempt stopped instead of starting from URL 1, page 1
+        resume = get_config().app.resume_crawls or retry_count > 0
+        async with profile_run(logger):
+            await crawl(db_client, logger, resume=resume)
 
         elapsed = time.time() - start
         logger.info(f"Scrape completed in {elapsed:.2f} seconds")
@@ -34,7 +46,7 @@ async def run_scrape_job(logger: Logger, retry_count: int = 0):
         error_msg = f"Scheduled scrape failed after {elapsed:.2f}s: {str(e)}"
         logger.error(error_msg, exc_info=True)
 
-        if config.discord.notify_on_error:
+        if get_config().discord.notify_on_error:
             send_discord_error(error_msg, logger.getChild("discord"), f"Attempt {retry_count + 1}/{max_retries + 1}")
 
         if retry_count < max_retries:
@@ -62,7 +74,7 @@ async def start_scheduler(logger: Logger) -> None:
 
     def handle_job_error(event: JobExecutionEvent):
         s_logger.error(f"Scheduled job failed: {event.exception}", exc_info=True)
-        if config.discord.notify_on_error:
+        if get_config().discord.notify_on_error:
             send_discord_error(
                 f"Job execution error: {event.exception}", s_logger.getChild("discord"), "Scheduler Job Error"
             )
@@ -88,7 +100,7 @@ async def start_scheduler(logger: Logger) -> None:
 
         # Run with timeout to prevent hanging
         # Set timeout slightly less than interval to avoid overlap
-        timeout_seconds = (config.scheduler.interval_minutes * 60) - 30  # 30s buffer
+        timeout_seconds = (get_config().scheduler.interval_minutes * 60) - TIMEOUT_BUFFER
 
         try:
             async with asyncio.timeout(timeout_seconds):
@@ -96,7 +108,7 @@ async def start_scheduler(logger: Logger) -> None:
         except asyncio.TimeoutError:
             error_msg = f"Scrape exceeded timeout of {timeout_seconds}s - possible hang or slow response"
             s_logger.error(error_msg)
-            if config.discord.notify_on_error:
+            if get_config().discord.notify_on_error:
                 send_discord_error(error_msg, s_logger.getChild("discord"), "Scrape Timeout")
 
         # Calculate and log duration
@@ -104,11 +116,11 @@ async def start_scheduler(logger: Logger) -> None:
         s_logger.info(f"Job completed in {job_duration:.1f}s")
 
         # Warn if approaching interval limit
-        interval_seconds = config.scheduler.interval_minutes * 60
+        interval_seconds = get_config().scheduler.interval_minutes * 60
         if job_duration > (interval_seconds * 0.8):
             warning = f"⚠️ Scrape took {job_duration:.1f}s ({job_duration / 60:.1f}min), close to {interval_seconds}s interval. Consider increasing interval_minutes."
             s_logger.warning(warning)
-            if config.discord.notify_on_error:
+            if get_config().discord.notify_on_error:
                 send_discord_error(warning, s_logger.getChild("discord"), "Performance Warning")
 
         last_job_end_time = time.time()
@@ -117,13 +129,14 @@ async def start_scheduler(logger: Logger) -> None:
     scheduler.add_listener(handle_job_executed, EVENT_JOB_EXECUTED)
     scheduler.add_listener(handle_max_instances, EVENT_JOB_MAX_INSTANCES)
 
-    timezone = pytz.timezone(config.scheduler.timezone)
+    timezone = pytz.timezone(get_config().scheduler.timezone)
 
     scheduler.add_job(
         run_scrape_job_with_cooldown,
         "interval",
         args=[s_logger],
-        minutes=config.scheduler.interval_minutes,
+        id=SCRAPE_JOB_ID,
+        minutes=get_config().scheduler.interval_minutes,
         timezone=timezone,
         max_instances=1,
     )
@@ -133,6 +146,11 @@ async def start_scheduler(logger: Logger) -> None:
     next_run = scheduler.get_jobs()[0].next_run_time
     s_logger.info(f"Scheduler started - next run at: {next_run.strftime('%Y-%m-%d %H:%M:%S %Z')}")
 
+    watcher = None
+    if get_config().scheduler.reload_config:
+        watcher = ConfigWatcher(scheduler, SCRAPE_JOB_ID, s_logger)
+        watcher.start()
+
     try:
         # Keep the scheduler running
         while True:
@@ -142,6 +160,9 @@ async def start_scheduler(logger: Logger) -> None:
         scheduler.shutdown()
     except Exception as e:
         s_logger.error(f"Scheduler crashed: {e}", exc_info=True)
-        if config.discord.notify_on_error:
+        if get_config().discord.notify_on_error:
             send_discord_error(f"Scheduler crashed: {e}", s_logger.getChild("discord"), "Critical Error")
         raise
+    finally:
+        if watcher is not None:
+            await watcher.stop()
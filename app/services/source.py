@@ -0,0 +1,126 @@
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime
+from logging import Logger
+from pathlib import Path
+
+from playwright.async_api import Page, Route
+
+from app.core.config import SourceConfig
+
+
+class PageSource:
+    """Live pages straight from the network. Base class for the record and replay sources."""
+
+    # Replayed crawls must not reach the outside world, e.g. Discord
+    live = True
+
+    def __init__(self, logger: Logger):
+        self.logger = logger.getChild("source")
+
+    async def attach(self, browser_page: Page):
+        """Prepare a freshly created browser page."""
+
+    async def goto(self, browser_page: Page, url: str):
+        return await browser_page.goto(url, wait_until="domcontentloaded", timeout=30000)  # 30s max
+
+    async def settle(self, seconds: float):
+        """Politeness delay between requests."""
+        await asyncio.sleep(seconds)
+
+    def close(self):
+        pass
+
+
+class RecordingPageSource(PageSource):
+    """Live source that also appends every navigated page to a gzip-compressed NDJSON archive."""
+
+    def __init__(self, logger: Logger, archive: str | Path):
+        super().__init__(logger)
+        self.archive = Path(archive)
+        self.archive.parent.mkdir(parents=True, exist_ok=True)
+        # Every run appends a new gzip member, which gzip readers transparently concatenate
+        self.file = gzip.open(self.archive, "at", encoding="utf-8")
+        self.count = 0
+
+    async def goto(self, browser_page: Page, url: str):
+        start = time.perf_counter()
+        response = await super().goto(browser_page, url)
+        elapsed = time.perf_counter() - start
+
+        record = {
+            "url": url,
+            "final_url": browser_page.url,
+            "status": response.status if response else 200,
+            "elapsed": round(elapsed, 3),
+            "recorded_at": datetime.now().isoformat(),
+            "html": await browser_page.content(),
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.count += 1
+
+        return response
+
+    def close(self):
+        self.file.close()
+        self.logger.info(f"Recorded {self.count} pages to {self.archive}")
+
+
+class ReplayPageSource(PageSource):
+    """Serve pages from a recorded archive without touching the network.
+
+    ``speed`` scales the recorded navigation times (2.0 replays twice as fast); 0 disables all delays.
+    """
+
+    live = False
+
+    def __init__(self, logger: Logger, archive: str | Path, speed: float = 0):
+        super().__init__(logger)
+        self.speed = speed
+        self.records = {}
+
+        with gzip.open(archive, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                # Later recordings of the same URL win
+                self.records[record["url"]] = record
+                self.records[record["final_url"]] = record
+
+        self.logger.info(f"Loaded {len(self.records)} recorded URLs from {archive}")
+
+    async def attach(self, browser_page: Page):
+        await browser_page.route("**/*", self.handle_route)
+
+    async def handle_route(self, route: Route):
+        record = self.records.get(route.request.url)
+
+        if record is not None and route.request.resource_type == "document":
+            await route.fulfill(status=record["status"], body=record["html"], content_type="text/html; charset=utf-8")
+        else:
+            # Images, scripts, trackers and anything that was not recorded
+            await route.abort()
+
+    async def goto(self, browser_page: Page, url: str):
+        record = self.records.get(url)
+        if record is None:
+            raise LookupError(f"{url} is not in the replay archive")
+
+        if self.speed > 0:
+            await asyncio.sleep(record["elapsed"] / self.speed)
+
+        return await super().goto(browser_page, url)
+
+    async def settle(self, seconds: float):
+        if self.speed > 0:
+            await asyncio.sleep(seconds / self.speed)
+
+
+def create_page_source(source_config: SourceConfig, logger: Logger) -> PageSource:
+    if source_config.mode == "record":
+        return RecordingPageSource(logger, source_config.archive)
+    if source_config.mode == "replay":
+        return ReplayPageSource(logger, source_config.archive, source_config.replay_speed)
+    return PageSource(logger)
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.core.config import SchedulerConfig
+from app.services.reload import ConfigWatcher
+
+JOB_ID = "scrape"
+
+
+async def noop():
+    pass
+
+
+def run_with_scheduler(check):
+    async def run():
+        scheduler = AsyncIOScheduler()
+        scheduler.add_job(noop, "interval", id=JOB_ID, minutes=3, timezone="Europe/Ljubljana")
+        scheduler.start()
+        try:
+            check(scheduler, ConfigWatcher(scheduler, JOB_ID, logging.getLogger("test")))
+        finally:
+            scheduler.shutdown(wait=False)
+
+    asyncio.run(run())
+
+
+def test_interval_change_keeps_disabled_job_paused():
+    def check(scheduler: AsyncIOScheduler, watcher: ConfigWatcher):
+        enabled = SchedulerConfig()
+        disabled = enabled.model_copy(update={"enabled": False})
+
+        watcher.reschedule(enabled, disabled)
+        assert scheduler.get_job(JOB_ID).next_run_time is None
+
+        watcher.reschedule(disabled, disabled.model_copy(update={"interval_minutes": 10}))
+        assert scheduler.get_job(JOB_ID).next_run_time is None
+
+        watcher.reschedule(disabled, disabled.model_copy(update={"timezone": "UTC"}))
+        assert scheduler.get_job(JOB_ID).next_run_time is None
+
+    run_with_scheduler(check)
+
+
+def test_enable_with_interval_change_resumes_job():
+    def check(scheduler: AsyncIOScheduler, watcher: ConfigWatcher):
+        enabled = SchedulerConfig()
+        disabled = enabled.model_copy(update={"enabled": False})
+
+        watcher.reschedule(enabled, disabled)
+        watcher.reschedule(disabled, enabled.model_copy(update={"interval_minutes": 10}))
+
+        job = scheduler.get_job(JOB_ID)
+        assert job.next_run_time is not None
+        assert job.trigger.interval.total_seconds() == 600
+
+    run_with_scheduler(check)